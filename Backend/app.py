@@ -5,11 +5,19 @@ from customer_routes import customer_bp
 from vehicle_routes import vehicle_bp
 from employee_routes import employee_bp
 from manager_routes import manager_bp
+from schema_cache import schema_catalog
+import metrics
+import app_logging
+import json_provider
+import compression
 from datetime import timedelta
 
 app = Flask(__name__)
 app.secret_key = "supersecretkey"
 
+# Encodes Decimal/date rows natively, with orjson when it's installed
+json_provider.init_app(app)
+
 # Optional: Session timeout
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=30)
 
@@ -31,4 +39,21 @@ app.register_blueprint(auth_bp, url_prefix="/api/auth")
 app.register_blueprint(customer_bp, url_prefix="/api/customer")
 app.register_blueprint(vehicle_bp, url_prefix="/api/vehicle")
 app.register_blueprint(employee_bp, url_prefix="/api/employee")
-app.register_blueprint(manager_bp, url_prefix="/api/manager")
\ No newline at end of file
+app.register_blueprint(manager_bp, url_prefix="/api/manager")
+
+# Queue-backed structured logging with per-request correlation IDs
+app_logging.init_app(app)
+logger = app_logging.get_logger(__name__)
+
+# Per-request timing/query counters and the Prometheus /api/metrics endpoint
+metrics.init_app(app)
+
+# gzip/br/zstd for large JSON bodies; registered last so it runs before the
+# metrics hook and response_bytes counts what goes over the wire
+compression.init_app(app)
+
+# Load table/column/key metadata once at startup instead of on first lookup
+try:
+    schema_catalog.load()
+except Exception as e:
+    logger.warning("Schema catalog not loaded at startup: %s", e)
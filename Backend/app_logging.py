@@ -0,0 +1,184 @@
+"""Structured, non-blocking logging for the API.
+
+Request threads only put records on an in-memory queue; a QueueListener
+thread formats and writes them to stdout. If the queue is full, records are
+dropped (and counted) rather than blocking. Every record carries the request's
+correlation ID (X-Request-ID, taken from the client or generated), which is
+echoed back in the response and attached to the per-request timing line that
+metrics.py logs.
+
+    logger = get_logger(__name__)
+    logger.info("Fetched %d vehicles", len(rows), extra=SAMPLED)
+
+SAMPLED marks high-volume success messages; only LOG_SAMPLE_RATE of them
+are kept. Settings: LOG_LEVEL (INFO), LOG_FORMAT (json or text),
+LOG_SAMPLE_RATE (1.0), LOG_QUEUE_SIZE (10000).
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+SAMPLED = {'sampled': True}
+
+_REQUEST_ID_RE = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def get_logger(name):
+    return logging.getLogger(f"autobase.{name}")
+
+
+class _ContextFilter(logging.Filter):
+    """Runs on the calling thread, so it can still read the request context"""
+
+    def filter(self, record):
+        if has_request_context():
+            if not hasattr(record, 'request_id'):
+                record.request_id = g.get('request_id')
+            if not hasattr(record, 'endpoint'):
+                record.endpoint = request.endpoint
+        return True
+
+
+class _SamplingFilter(logging.Filter):
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return not getattr(record, 'sampled', False) or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != 'sampled':
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = f"{self.formatTime(record)} {record.levelname} {record.name} {record.getMessage()}"
+        extras = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS and k != 'sampled'}
+        if extras:
+            line += ' ' + ' '.join(f"{k}={v}" for k, v in extras.items())
+        if record.exc_text:
+            line += '\n' + record.exc_text
+        return line
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge args and render the traceback here, but leave formatting to the listener
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _LoggingState:
+    handler = None
+    listener = None
+    output = None
+
+
+def configure_logging():
+    """Route the autobase.* loggers through the background queue (idempotent)"""
+    if _LoggingState.handler is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if os.getenv('LOG_FORMAT', 'json') == 'text' else JsonFormatter())
+
+    handler = _NonBlockingQueueHandler(queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000'))))
+    handler.addFilter(_SamplingFilter(float(os.getenv('LOG_SAMPLE_RATE', '1.0'))))
+    handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger('autobase')
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    root.addHandler(handler)
+    root.propagate = False
+
+    _LoggingState.handler = handler
+    _LoggingState.output = output
+    _start_listener()
+    atexit.register(_stop_listener)
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def _start_listener():
+    _LoggingState.listener = QueueListener(_LoggingState.handler.queue, _LoggingState.output)
+    _LoggingState.listener.start()
+
+
+def _stop_listener():
+    if _LoggingState.listener is not None:
+        _LoggingState.listener.stop()
+        _LoggingState.listener = None
+
+
+def _after_fork():
+    # The writer thread doesn't survive fork (gunicorn --preload); give the child its own
+    if _LoggingState.handler is not None:
+        _LoggingState.handler.queue = queue.Queue(maxsize=_LoggingState.handler.queue.maxsize)
+        _start_listener()
+
+
+def dropped_records():
+    return _LoggingState.handler.dropped if _LoggingState.handler else 0
+
+
+def request_id_from(incoming):
+    """Reuse the caller's X-Request-ID (e.g. from a proxy) only if it looks like one"""
+    if incoming and _REQUEST_ID_RE.fullmatch(incoming):
+        return incoming
+    return uuid.uuid4().hex
+
+
+def _assign_request_id():
+    g.request_id = request_id_from(request.headers.get('X-Request-ID'))
+
+
+def _echo_request_id(response):
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+
+def init_app(app):
+    configure_logging()
+    app.before_request(_assign_request_id)
+    app.after_request(_echo_request_id)
@@ -0,0 +1,319 @@
+"""ASGI entry point (optional async serving mode).
+
+    pip install aiomysql uvicorn
+    uvicorn asgi:app --workers 2
+
+Only the two endpoints in ASYNC_ROUTES (GET /api/vehicle/vehicles and
+GET /api/employee/sales_orders) run natively on the event loop against an
+aiomysql pool, so one process can keep many of those waiting on MySQL at once. They reuse the sync routes' query builders and page helpers,
+so both paths return identical responses. Every other route is the regular
+Flask app, run on a thread pool of ASGI_SYNC_THREADS threads (default 32)
+with streamed responses passed through chunk by chunk. Without aiomysql, or
+if the async pool can't start, everything goes through the Flask app.
+"""
+import asyncio
+import concurrent.futures
+import io
+import os
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+
+from itsdangerous import BadSignature
+from werkzeug.datastructures import MultiDict
+
+from app import app as flask_app, FRONTEND_ORIGIN
+from app_logging import get_logger, request_id_from, SAMPLED
+from async_db import async_pool
+import compression
+from conditional import table_versions, not_modified
+from employee_routes import sales_orders_query, sales_orders_page
+from metrics import registry
+from vehicle_routes import vehicles_query, vehicles_page
+
+logger = get_logger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ASGI_SYNC_THREADS', '32')),
+    thread_name_prefix='wsgi',
+)
+
+# How often a worker thread blocked on a full response queue checks whether the client is gone
+WSGI_PUT_POLL_SECONDS = 1.0
+
+
+class AsyncRequest:
+    def __init__(self, scope):
+        self.method = scope['method']
+        self.path = scope['path']
+        query_string = scope.get('query_string', b'').decode('latin-1')
+        self.args = MultiDict(urllib.parse.parse_qsl(query_string))
+        # Same form as Flask's request.full_path, so both paths produce the same ETags
+        self.full_path = f"{self.path}?{query_string}"
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        self.request_id = request_id_from(self.headers.get('x-request-id'))
+        self._session = None
+
+    @property
+    def session(self):
+        """The Flask session cookie, verified with the app's secret key"""
+        if self._session is None:
+            self._session = {}
+            cookie = SimpleCookie(self.headers.get('cookie', '')).get(flask_app.config['SESSION_COOKIE_NAME'])
+            if cookie:
+                serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+                try:
+                    self._session = serializer.loads(
+                        cookie.value, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+                except BadSignature:
+                    pass
+        return self._session
+
+
+# --- Native async routes (same endpoint names as the Flask views) ---
+
+async def get_vehicles(request):
+    # Mirrors @etag_from('Vehicle') on the Flask view
+    etag = table_versions.etag(('vehicle',), request.full_path, None, None)
+    if not_modified(request.headers.get('if-none-match'), etag):
+        return 304, None, {'etag': etag, 'cache-control': 'private, no-cache'}
+
+    try:
+        query, params, limit = vehicles_query(request.args)
+    except (ValueError, TypeError):
+        return 400, {'error': 'Invalid filter or paging parameter'}
+
+    vehicles = await async_pool.fetch_all(query, params, cache_ttl=30, compact=True)
+    page = vehicles_page(vehicles, limit)
+    if page['vehicle']:
+        logger.info("Fetched %d available vehicles", len(page['vehicle']),
+                    extra={**SAMPLED, 'request_id': request.request_id})
+    if etag is None:
+        return 200, page
+    return 200, page, {'etag': etag, 'cache-control': 'private, no-cache'}
+
+
+async def get_sales_orders(request):
+    user = request.session.get('user')
+    if not user or user.get('user_type') not in ('employee', 'manager'):
+        return 401, {'error': 'Unauthorized'}
+
+    try:
+        query, params, limit = sales_orders_query(request.args)
+    except ValueError as e:
+        return 400, {'error': str(e)}
+
+    sales_orders = await async_pool.fetch_all(query, params, compact=True)
+    page = sales_orders_page(sales_orders, limit)
+    logger.info("Fetched %d sales orders", len(page['sales_orders']),
+                extra={**SAMPLED, 'request_id': request.request_id})
+    return 200, page
+
+
+ASYNC_ROUTES = {
+    ('GET', '/api/vehicle/vehicles'): ('vehicle.get_vehicles', get_vehicles),
+    ('GET', '/api/employee/sales_orders'): ('employee.get_sales_orders', get_sales_orders),
+}
+
+
+def _encode(obj):
+    if hasattr(flask_app.json, 'dumps_bytes'):
+        return flask_app.json.dumps_bytes(obj)
+    return flask_app.json.dumps(obj).encode('utf-8')
+
+
+async def _run_async_route(scope, send, endpoint, handler):
+    start = time.perf_counter()
+    request = AsyncRequest(scope)
+    try:
+        status, body, *extra = await handler(request)
+    except Exception:
+        logger.exception("Error in %s", endpoint.split('.')[-1],
+                         extra={'request_id': request.request_id, 'endpoint': endpoint})
+        status, body, extra = 500, {'error': 'Request failed'}, ()
+    handler_time = time.perf_counter() - start
+
+    payload = b'' if status == 304 else _encode(body) + b'\n'
+    encoding = None
+    if compression.ENABLED and len(payload) >= compression.MIN_SIZE:
+        encoding = compression.negotiate(request.headers.get('accept-encoding'))
+        if encoding:
+            payload = compression.compress(payload, encoding)
+    headers = [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(payload)).encode()),
+        (b'x-request-id', request.request_id.encode('latin-1')),
+    ]
+    if compression.ENABLED:
+        headers.append((b'vary', b'Accept-Encoding'))
+    if encoding:
+        headers.append((b'content-encoding', encoding.encode()))
+    for name, value in (extra[0] if extra else {}).items():
+        headers.append((name.encode('latin-1'), value.encode('latin-1')))
+    # Mirror the Flask-CORS settings in app.py
+    if request.headers.get('origin') == FRONTEND_ORIGIN:
+        headers += [
+            (b'access-control-allow-origin', FRONTEND_ORIGIN.encode()),
+            (b'access-control-allow-credentials', b'true'),
+            (b'vary', b'Origin'),
+        ]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+    # Query count/rows aren't tracked on this path; handler time (mostly awaiting
+    # the DB) is reported as DB time
+    registry.observe(endpoint, request.method, str(status), time.perf_counter() - start,
+                     handler_time, 0, 0, len(payload), 0.0)
+
+
+# --- Everything else: the Flask app on a thread pool ---
+
+def _environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope['headers']:
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'CONTENT_LENGTH':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _run_wsgi(scope, receive, send):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+
+    loop = asyncio.get_running_loop()
+    # Small bound so a slow client applies backpressure to the worker thread
+    chunks = asyncio.Queue(maxsize=8)
+    # Set once nobody will read the queue again (client gone, send failed, cancelled)
+    closed = threading.Event()
+    environ = _environ(scope, body)
+
+    def put(item):
+        if closed.is_set():
+            raise OSError("Client disconnected")
+        future = asyncio.run_coroutine_threadsafe(chunks.put(item), loop)
+        while True:
+            try:
+                return future.result(timeout=WSGI_PUT_POLL_SECONDS)
+            except concurrent.futures.TimeoutError:
+                if closed.is_set():
+                    future.cancel()
+                    raise OSError("Client disconnected")
+
+    def start_response(status, headers, exc_info=None):
+        put(('start', int(status.split(' ', 1)[0]),
+             [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]))
+        return lambda data: put(('body', data))
+
+    def run():
+        # Iterate the whole response on one thread: stream_with_context needs that.
+        # If put() gives up, close() still runs, ending the stream and its query.
+        result = None
+        try:
+            result = flask_app(environ, start_response)
+            for chunk in result:
+                if chunk:
+                    put(('body', chunk))
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+            if not closed.is_set():
+                put(('end',))
+
+    task = loop.run_in_executor(_executor, run)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    started = finished = False
+    try:
+        while True:
+            getter = asyncio.ensure_future(chunks.get())
+            await asyncio.wait((getter, disconnected), return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                getter.cancel()
+                return
+            item = getter.result()
+            if item[0] == 'start':
+                started = True
+                await send({'type': 'http.response.start', 'status': item[1], 'headers': item[2]})
+            elif item[0] == 'body':
+                await send({'type': 'http.response.body', 'body': item[1], 'more_body': True})
+            else:
+                break
+        if not started:
+            # The app raised before start_response
+            await send({'type': 'http.response.start', 'status': 500, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+        finished = True
+    finally:
+        closed.set()
+        disconnected.cancel()
+        if finished:
+            await task
+        else:
+            # Wait for run() to close the response, so its DB connection is back in the pool
+            await asyncio.wait((task,))
+            if not task.cancelled() and task.exception() is not None:
+                logger.info("Response abandoned: %s", task.exception())
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await async_pool.start()
+            except Exception as e:
+                logger.warning("Async DB pool not started, serving every route through Flask: %s", e)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_pool.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    route = ASYNC_ROUTES.get((scope['method'], scope['path']))
+    if route and async_pool.available:
+        await _run_async_route(scope, send, *route)
+    else:
+        await _run_wsgi(scope, receive, send)
@@ -0,0 +1,82 @@
+"""Async MySQL access for the ASGI entry point (asgi.py), built on aiomysql.
+
+Optional: pip install aiomysql. The pool uses the same DB_* settings and
+DB_POOL_SIZE / DB_POOL_MAX_OVERFLOW / DB_POOL_RECYCLE as the sync pool, and
+fetch_all() shares the query result cache with execute_query().
+"""
+from database import db_config, pool_config
+from db_utils import Rows
+from query_cache import query_cache, tables_in, is_write
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+
+class AsyncPool:
+    def __init__(self, config, size=5, max_overflow=10, recycle=3600):
+        self.config = config
+        self.size = size
+        self.max_overflow = max_overflow
+        self.recycle = recycle
+        self._pool = None
+
+    @property
+    def available(self):
+        return self._pool is not None
+
+    async def start(self):
+        """Create the pool on the running event loop (ASGI lifespan startup)"""
+        if aiomysql is None:
+            raise RuntimeError("aiomysql is not installed")
+        self._pool = await aiomysql.create_pool(
+            host=self.config['host'],
+            user=self.config['user'],
+            password=self.config['password'],
+            db=self.config['database'],
+            minsize=0,
+            maxsize=self.size + self.max_overflow,
+            pool_recycle=self.recycle,
+            autocommit=True,
+        )
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    async def fetch_all(self, query, params=None, cache_ttl=None, compact=False):
+        """Async counterpart of execute_query() for reads. Raises on error."""
+        if is_write(query):
+            raise ValueError("fetch_all is read-only; use the sync transaction() for writes")
+
+        use_cache = cache_ttl is not None and query_cache.enabled
+        if use_cache:
+            cache_key = query_cache.make_key(query, params, False, compact)
+            cached = query_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        async with self._pool.acquire() as conn:
+            cursor_class = aiomysql.Cursor if compact else aiomysql.DictCursor
+            async with conn.cursor(cursor_class) as cursor:
+                await cursor.execute(query, params or None)
+                rows = await cursor.fetchall()
+                if compact:
+                    rows = Rows([d[0] for d in cursor.description], list(rows))
+                else:
+                    rows = list(rows)
+
+        if use_cache:
+            query_cache.set(cache_key, rows, tables_in(query), cache_ttl)
+        return rows
+
+
+async_pool = AsyncPool(
+    db_config,
+    size=pool_config['size'],
+    max_overflow=pool_config['max_overflow'],
+    recycle=int(pool_config['recycle']),
+)
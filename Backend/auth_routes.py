@@ -1,10 +1,12 @@
 from flask import Blueprint, jsonify, request, session
 from dotenv import load_dotenv
 from database import get_db_connection
+from app_logging import get_logger
 
 load_dotenv()
 
 auth_bp = Blueprint('auth', __name__)
+logger = get_logger(__name__)
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
@@ -23,7 +25,7 @@ def login():
         return jsonify({'error': 'Invalid user type'}), 400
 
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor(dictionary=True, buffered=True)
 
     try:
         # Query the appropriate table based on user type
@@ -48,24 +50,17 @@ def login():
             # If logging in as manager, verify the employee is actually a manager
             if user_type == 'manager':
                 # Per project rules: if Employee.Mgr_ID is NULL then they are a manager
-                conn2 = get_db_connection()
-                cursor2 = conn2.cursor(dictionary=True)
-                try:
-                    cursor2.execute(
-                        "SELECT Mgr_ID FROM Employee WHERE ID = %s",
-                        (user[id_field],)
-                    )
-                    row = cursor2.fetchone()
-                    if not row:
-                        cursor2.close()
-                        conn2.close()
-                        return jsonify({'error': 'Manager record not found'}), 401
-
-                    mgr_id = row.get('Mgr_ID')
-                    is_manager = mgr_id is None
-                finally:
-                    cursor2.close()
-                    conn2.close()
+                # Reuse the login connection instead of checking out a second one
+                cursor.execute(
+                    "SELECT Mgr_ID FROM Employee WHERE ID = %s",
+                    (user[id_field],)
+                )
+                row = cursor.fetchone()
+                if not row:
+                    return jsonify({'error': 'Manager record not found'}), 401
+
+                mgr_id = row.get('Mgr_ID')
+                is_manager = mgr_id is None
 
                 if not is_manager:
                     return jsonify({'error': 'Not authorized as manager'}), 401
@@ -75,14 +70,14 @@ def login():
             session['user'] = user_data
             session.modified = True
             
-            print(f"Login successful: {username} ({user_type})")
+            logger.info("Login successful: %s (%s)", username, user_type)
             
             return jsonify({
                 'message': 'Login successful',
                 'user': user_data
             }), 200
         else:
-            print(f"Login failed: {username} ({user_type})")
+            logger.warning("Login failed: %s (%s)", username, user_type)
             return jsonify({'error': 'Invalid credentials'}), 401
 
     finally:
@@ -97,7 +92,7 @@ def logout():
     session.pop('user', None)
     session.modified = True
     
-    print(f"Logout: {username}")
+    logger.info("Logout: %s", username)
     return jsonify({'message': 'Logged out successfully'}), 200
 
 
@@ -107,8 +102,8 @@ def current_user():
     user = session.get('user')
     
     if user:
-        print(f"Session check: {user['username']} ({user['user_type']})")
+        logger.debug("Session check: %s (%s)", user['username'], user['user_type'])
         return jsonify({'user': user}), 200
     else:
-        print("No active session")
+        logger.debug("No active session")
         return jsonify({'user': None}), 200
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""CPU time vs. bytes saved for response compression on our report payloads.
+
+Payloads are encoded with FastJSONProvider and shaped like the customer
+vehicles and waiting vehicles reports, the sales order listing and the
+nested service history. Each available algorithm (gzip always, br and zstd
+when brotli / zstandard are installed) is measured at a few levels, one-shot
+and streamed the way compression.py streams reports (flush every chunk).
+Run from Backend/:
+
+    python benchmarks/bench_compression.py [--rows 50000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask
+
+import compression
+from json_provider import FastJSONProvider, TupleRows
+from streaming import CHUNK_ROWS
+from bench_json import SALES_COLUMNS, sales_rows, service_orders
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 6, 11), 'zstd': (1, 3, 9, 19)}
+
+
+def customer_vehicles(n):
+    return [{'Customer ID': i, 'Customer Name': f"Customer {i}",
+             'Vehicle Amount': 1 + i % 3, 'Service Times': i % 7} for i in range(n)]
+
+
+def waiting_vehicles(n):
+    return [{'Customer ID': i // 4, 'Customer Name': f"Customer {i // 4}",
+             'Vehicle VIN': f"1HGCM82633A{i // 2:06d}", 'Status': 'WAITING',
+             'Part ID': i % 300, 'Part Name': f"Part {i % 300}",
+             'Quantity': 1 + i % 4, 'Stock': i % 50} for i in range(n)]
+
+
+def one_shot(encoder, body):
+    return len(encoder.compress(body) + encoder.finish())
+
+
+def streamed(encoder, body, rows):
+    """Compress CHUNK_ROWS rows' worth of bytes at a time with a flush after each, like _compress_stream"""
+    step = max(1, len(body) * CHUNK_ROWS // rows)
+    out = 0
+    for start in range(0, len(body), step):
+        out += len(encoder.compress(body[start:start + step]) + encoder.flush())
+    return out + len(encoder.finish())
+
+
+def bench(fn):
+    fn()  # warm up
+    runs = []
+    for _ in range(3):
+        start = time.perf_counter()
+        size = fn()
+        runs.append(time.perf_counter() - start)
+    return min(runs), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    fast_json = FastJSONProvider(app)
+    payloads = {
+        'customer-vehicles report': (args.rows, {'data': customer_vehicles(args.rows)}),
+        'waiting-vehicles report': (args.rows, {'data': waiting_vehicles(args.rows)}),
+        'sales orders': (args.rows, {'sales_orders': TupleRows(SALES_COLUMNS, sales_rows(args.rows))}),
+        'service history': (args.rows // 10, {'service_orders': service_orders(args.rows // 10)}),
+    }
+
+    print(f"Algorithms available: {', '.join(compression.ENCODERS)}")
+    with app.app_context():
+        for label, (rows, payload) in payloads.items():
+            body = fast_json.dumps_bytes(payload)
+            print(f"{label} ({len(body) / 1e6:.1f} MB JSON)")
+            for name, encoder_class in compression.ENCODERS.items():
+                for level in LEVELS[name]:
+                    once, size = bench(lambda: one_shot(encoder_class(level), body))
+                    chunked, chunked_size = bench(lambda: streamed(encoder_class(level), body, rows))
+                    print(f"  {name:<4} level {level:<2}  {size / len(body) * 100:5.1f}% of original"
+                          f"  {once * 1000:8.1f} ms ({len(body) / once / 1e6:6.1f} MB/s)"
+                          f"  streamed {chunked_size / len(body) * 100:5.1f}%  {chunked * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
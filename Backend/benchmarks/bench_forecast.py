@@ -0,0 +1,75 @@
+"""Parts forecast: vectorized parts_forecast.forecast() vs. a per-part Python loop.
+
+Usage rows are synthetic (Part_ID, Days_Ago, Quantity) tuples, as the
+aggregated history query returns them. Needs numpy. Run from Backend/:
+
+    python benchmarks/bench_forecast.py [--parts 20000] [--rows 2000000] [--history-days 180]
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+from statistics import NormalDist
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from parts_forecast import forecast
+
+
+def synthetic(parts, rows, history_days, seed=7):
+    rng = np.random.default_rng(seed)
+    # Skewed popularity: a few parts account for most of the usage
+    part_rows = [(i, f"Part {i}", int(s)) for i, s in enumerate(rng.integers(0, 200, parts), start=1)]
+    part_ids = np.minimum(rng.zipf(1.3, rows), parts)
+    usage = np.column_stack((part_ids, rng.integers(0, history_days, rows), rng.integers(1, 6, rows)))
+    return part_rows, [tuple(row) for row in usage.tolist()]
+
+
+def per_part_loop(parts, usage, history_days, window_days=30, lead_time_days=7, service_level=0.95):
+    """The straightforward version: bucket rows by part, then compute each part on its own"""
+    by_part = {}
+    for part_id, days_ago, quantity in usage:
+        by_part.setdefault(part_id, []).append((days_ago, quantity))
+    z = NormalDist().inv_cdf(service_level)
+    result = []
+    for part_id, name, stock in parts:
+        daily = [0] * history_days
+        for days_ago, quantity in by_part.get(part_id, ()):
+            if 0 <= days_ago < history_days:
+                daily[history_days - 1 - days_ago] += quantity
+        window = daily[-window_days:]
+        rate = sum(window) / len(window)
+        safety = z * statistics.pstdev(window) * math.sqrt(lead_time_days)
+        result.append((part_id, rate, rate * lead_time_days + safety))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--parts', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--history-days', type=int, default=180)
+    args = parser.parse_args()
+
+    parts, usage = synthetic(args.parts, args.rows, args.history_days)
+    print(f"{args.parts:,} parts, {args.rows:,} usage rows, {args.history_days} days of history")
+
+    forecast(parts[:100], usage[:1000], args.history_days)  # warm up
+    start = time.perf_counter()
+    rows = forecast(parts, usage, args.history_days)
+    vectorized = time.perf_counter() - start
+    flagged = sum(1 for row in rows.rows if row[-1])
+    print(f"  vectorized forecast       {vectorized * 1000:9.1f} ms  ({flagged:,} parts need reorder)")
+
+    start = time.perf_counter()
+    per_part_loop(parts, usage, args.history_days)
+    loop = time.perf_counter() - start
+    print(f"  per-part loop             {loop * 1000:9.1f} ms  ({loop / vectorized:.1f}x slower)")
+
+
+if __name__ == '__main__':
+    main()
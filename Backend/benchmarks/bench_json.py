@@ -0,0 +1,112 @@
+"""Encode throughput for large listings: Flask's default provider vs FastJSONProvider.
+
+Rows are synthetic but shaped like /api/employee/sales_orders and the nested
+service history from /api/employee/service/customer/<id>. Run from Backend/:
+
+    python benchmarks/bench_json.py [--rows 100000]
+"""
+import argparse
+import datetime
+import decimal
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import json_provider
+from json_provider import FastJSONProvider, TupleRows
+
+SALES_COLUMNS = ('ID', 'Sales_Date', 'Price', 'Vehicle_VIN', 'Sales_Employee_ID',
+                 'Customer_Name', 'Sales_Employee_Name', 'Make', 'Model', 'Year')
+
+
+def sales_rows(n):
+    start = datetime.date(2020, 1, 1)
+    return [
+        (i, start + datetime.timedelta(days=i % 1500), decimal.Decimal(f"{15000 + i % 40000}.99"),
+         f"1HGCM82633A{i:06d}", i % 40 or None, f"Customer {i % 5000}", f"Employee {i % 40}",
+         ('Toyota', 'Honda', 'Ford', 'BMW')[i % 4], ('Camry', 'Civic', 'F-150', 'X5')[i % 4], 2010 + i % 15)
+        for i in range(n)
+    ]
+
+
+def service_orders(n):
+    start = datetime.date(2020, 1, 1)
+    return [
+        {
+            'ID': i,
+            'Date_From': start + datetime.timedelta(days=i % 1500),
+            'Date_To': start + datetime.timedelta(days=i % 1500 + 2),
+            'ServiceStatus': 'Completed',
+            'Price': decimal.Decimal(f"{200 + i % 900}.50"),
+            'Vehicle_VIN': f"1HGCM82633A{i:06d}",
+            'assigned_employee': f"Employee {i % 40}",
+            'lines': [
+                {
+                    'ID': i * 3 + j,
+                    'service_type': ('Oil Change', 'Brake Pads', 'Tire Rotation')[j],
+                    'labor_hours': decimal.Decimal('1.50'),
+                    'labor_rate': decimal.Decimal('95.00'),
+                    'parts': [
+                        {'part_id': k, 'part_name': f"Part {k}", 'part_price': decimal.Decimal('24.99'),
+                         'part_quantity': 1 + k % 3}
+                        for k in range(j)
+                    ],
+                }
+                for j in range(3)
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+def bench(label, fn, rows):
+    fn()  # warm up
+    runs = []
+    for _ in range(3):
+        start = time.perf_counter()
+        size = len(fn())
+        runs.append(time.perf_counter() - start)
+    best = min(runs)
+    print(f"  {label:<34} {best * 1000:8.1f} ms  {rows / best:12,.0f} rows/s  {size / best / 1e6:7.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    flask_json = DefaultJSONProvider(app)
+    fast_json = FastJSONProvider(app)
+
+    tuples = sales_rows(args.rows)
+    dicts = [dict(zip(SALES_COLUMNS, row)) for row in tuples]
+    table = TupleRows(SALES_COLUMNS, tuples)
+    services = service_orders(args.rows // 10)
+
+    with app.app_context():
+        print(f"Sales orders ({args.rows:,} rows)")
+        bench('flask default, dict rows', lambda: flask_json.dumps({'sales_orders': dicts}), args.rows)
+        if json_provider.orjson is not None:
+            bench('fast (orjson), dict rows', lambda: fast_json.dumps_bytes({'sales_orders': dicts}), args.rows)
+            bench('fast (orjson), tuple rows', lambda: fast_json.dumps_bytes({'sales_orders': table}), args.rows)
+        orjson, json_provider.orjson = json_provider.orjson, None
+        bench('fast (stdlib), dict rows', lambda: fast_json.dumps_bytes({'sales_orders': dicts}), args.rows)
+        json_provider.orjson = orjson
+
+        print(f"Service history ({len(services):,} orders, 3 lines each)")
+        bench('flask default', lambda: flask_json.dumps({'service_orders': services}), len(services))
+        if json_provider.orjson is not None:
+            bench('fast (orjson)', lambda: fast_json.dumps_bytes({'service_orders': services}), len(services))
+        json_provider.orjson = None
+        bench('fast (stdlib)', lambda: fast_json.dumps_bytes({'service_orders': services}), len(services))
+        json_provider.orjson = orjson
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Memory and encode cost of dict rows vs. compact Rows for a large listing.
+
+Also times encoding Rows straight from the tuples (key prefixes plus one
+orjson.dumps per value) against the chunked dicts json_provider uses.
+
+Run from Backend/:
+
+    python benchmarks/bench_rows.py [--rows 100000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask
+
+from bench_json import SALES_COLUMNS, sales_rows
+from db_utils import Rows
+import json_provider
+from json_provider import FastJSONProvider
+
+
+def encode_per_value(provider, rows):
+    """Tuple-direct alternative: no dicts, one orjson call per value"""
+    orjson = json_provider.orjson
+    columns = rows.columns
+    order = sorted(range(len(columns)), key=lambda i: columns[i]) if provider.sort_keys else range(len(columns))
+    prefixes = [(i, (b',' if n else b'{') + orjson.dumps(columns[i]) + b':') for n, i in enumerate(order)]
+    dumps = orjson.dumps
+    options = provider._options()
+    default = json_provider._default
+    return b'[' + b','.join(
+        b''.join([prefix + dumps(row[i], default=default, option=options) for i, prefix in prefixes]) + b'}'
+        for row in rows.rows
+    ) + b']'
+
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    tuples = sales_rows(args.rows)
+    # Fresh tuples so both sides pay for their per-row containers (values are shared)
+    dicts, dict_bytes = measure(lambda: [dict(zip(SALES_COLUMNS, row)) for row in tuples])
+    rows, rows_bytes = measure(lambda: Rows(SALES_COLUMNS, [tuple(list(row)) for row in tuples]))
+
+    app = Flask(__name__)
+    provider = FastJSONProvider(app)
+    with app.app_context():
+        timings = {}
+        for label, value in (('dict rows', dicts), ('Rows', rows)):
+            start = time.perf_counter()
+            provider.dumps_bytes({'sales_orders': value})
+            timings[label] = time.perf_counter() - start
+
+    print(f"Sales orders ({args.rows:,} rows, {len(SALES_COLUMNS)} columns)")
+    print(f"  {'dict rows':<10} {dict_bytes / 1e6:8.1f} MB  encode {timings['dict rows'] * 1000:7.1f} ms")
+    print(f"  {'Rows':<10} {rows_bytes / 1e6:8.1f} MB  encode {timings['Rows'] * 1000:7.1f} ms")
+    print(f"  container overhead: {dict_bytes / rows_bytes:.1f}x smaller with Rows")
+
+    if json_provider.orjson is not None:
+        with app.app_context():
+            assert encode_per_value(provider, rows) == provider.dumps_bytes(rows)
+            for label, encode in (('chunked dicts', provider.dumps_bytes),
+                                  ('per value', lambda r: encode_per_value(provider, r))):
+                best = min(timed(encode, rows) for _ in range(3))
+                _, peak = measure_peak(lambda: encode(rows))
+                print(f"  Rows encode, {label:<14} {best * 1000:7.1f} ms  peak {peak / 1e6:6.1f} MB")
+
+
+def timed(fn, arg):
+    start = time.perf_counter()
+    fn(arg)
+    return time.perf_counter() - start
+
+
+def measure_peak(build):
+    tracemalloc.start()
+    result = build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, peak
+
+
+if __name__ == '__main__':
+    main()
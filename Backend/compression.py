@@ -0,0 +1,163 @@
+"""Response compression negotiated from Accept-Encoding (zstd, br, gzip).
+
+Registered in app.py. JSON, NDJSON and text responses of at least
+COMPRESS_MIN_SIZE bytes (default 1024) are compressed with the first
+algorithm in COMPRESS_ALGORITHMS that the client accepts and that is
+installed. gzip is always available; brotli (pip install brotli) and zstd
+(pip install zstandard) are optional. Streamed reports are compressed chunk
+by chunk with a flush after each one, so rows still reach the client as
+they are fetched.
+
+    COMPRESSION_ENABLED=true
+    COMPRESS_ALGORITHMS=zstd,br,gzip   # server preference order
+    COMPRESS_MIN_SIZE=1024
+    COMPRESS_GZIP_LEVEL=6              # 1-9
+    COMPRESS_BR_LEVEL=4                # 0-11
+    COMPRESS_ZSTD_LEVEL=3              # 1-22
+
+Set COMPRESSION_ENABLED=false when a reverse proxy already compresses.
+"""
+import os
+import zlib
+
+from flask import request
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+LEVELS = {
+    'gzip': int(os.getenv('COMPRESS_GZIP_LEVEL', '6')),
+    'br': int(os.getenv('COMPRESS_BR_LEVEL', '4')),
+    'zstd': int(os.getenv('COMPRESS_ZSTD_LEVEL', '3')),
+}
+
+
+class GzipEncoder:
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, level):
+        self._c = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level):
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._c.compress(data)
+
+    def flush(self):
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._c.flush()
+
+
+ENCODERS = {'gzip': GzipEncoder}
+if brotli is not None:
+    ENCODERS['br'] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS['zstd'] = ZstdEncoder
+
+PREFERENCE = [name.strip() for name in os.getenv('COMPRESS_ALGORITHMS', 'zstd,br,gzip').split(',')
+              if name.strip() in ENCODERS]
+
+
+def negotiate(accept_encoding):
+    """Pick an encoding for an Accept-Encoding header value, or None"""
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_header(accept_encoding)
+    for name in PREFERENCE:
+        if accepted.quality(name) > 0:
+            return name
+    return None
+
+
+def compress(data, encoding):
+    """One-shot compression of a complete body"""
+    encoder = ENCODERS[encoding](LEVELS[encoding])
+    return encoder.compress(data) + encoder.finish()
+
+
+def _compress_stream(body, encoder):
+    try:
+        for chunk in body:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = encoder.compress(chunk) + encoder.flush()
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        # Let stream_with_context release the request context and connection
+        if hasattr(body, 'close'):
+            body.close()
+
+
+def _after_request(response):
+    if (request.method == 'HEAD'
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, ENCODERS[encoding](LEVELS[encoding]))
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_SIZE:
+            return response
+        response.set_data(compress(data, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        # Strong ETags are byte-exact, so each encoding needs its own
+        response.headers['ETag'] = f'{etag[:-1]}-{encoding}"'
+    return response
+
+
+def init_app(app):
+    if ENABLED:
+        app.after_request(_after_request)
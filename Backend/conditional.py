@@ -0,0 +1,151 @@
+"""Conditional GET for listing endpoints: ETags from per-table change versions.
+
+Every write through db_utils (execute_query, transaction(), bulk loads) bumps
+the version of the tables it touched, at the same point it evicts the query
+cache. A view decorated with @etag_from('vehicle', ...) gets a weak ETag
+derived from those versions, the URL and (with per_user=True) the session
+user, so a matching If-None-Match is answered with 304 before the view runs
+any SQL. Browsers revalidate on their own thanks to Cache-Control: no-cache,
+so the frontend needs no changes.
+
+Versions live in the query cache's backend (QUERY_CACHE_BACKEND): per process
+for memory, shared through Redis otherwise. ETags also roll over every
+ETAG_MAX_AGE seconds (default 60, 0 = never), which bounds how long a write
+made on another worker (memory backend) or a lost Redis update can go unseen.
+Last-Modified isn't emitted: HTTP dates have one-second resolution, too coarse
+to tell writes within the same second apart.
+"""
+import functools
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+from flask import current_app, request, session
+from werkzeug.http import quote_etag
+
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class MemoryVersions:
+    """Per-process counters. The random epoch keeps ETags from a previous run from matching."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+        self.epoch = uuid.uuid4().hex
+
+    def bump(self, tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def get(self, tables):
+        return [self.epoch] + [self._versions.get(table, 0) for table in tables]
+
+
+class RedisVersions:
+    """Counters in one Redis hash, shared by every worker"""
+
+    def __init__(self, url, key='autobase:table_versions'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("QUERY_CACHE_BACKEND=redis requires the 'redis' package")
+        self._client = redis.Redis.from_url(url)
+        self.key = key
+
+    def bump(self, tables):
+        pipe = self._client.pipeline()
+        for table in tables:
+            pipe.hincrby(self.key, table, 1)
+        pipe.execute()
+
+    def get(self, tables):
+        # The epoch field changes if the hash is lost (flush, eviction), so
+        # counters restarting from zero can't reproduce an old ETag
+        self._client.hsetnx(self.key, '_epoch', uuid.uuid4().hex)
+        values = self._client.hmget(self.key, ['_epoch', *tables])
+        return [int(v) if v is not None and i else v for i, v in enumerate(values)]
+
+
+class TableVersions:
+    def __init__(self, backend, max_age=60):
+        self.backend = backend
+        self.max_age = max_age
+
+    def bump(self, tables):
+        if not tables:
+            return
+        try:
+            self.backend.bump(sorted(tables))
+        except Exception as e:
+            logger.warning("Table version bump failed: %s", e)
+
+    def etag(self, tables, *parts):
+        """Weak ETag for `tables` at their current versions, or None if they can't be read"""
+        try:
+            versions = self.backend.get(tables)
+        except Exception as e:
+            logger.warning("Table version lookup failed: %s", e)
+            return None
+        window = int(time.time() // self.max_age) if self.max_age > 0 else 0
+        raw = repr((versions, window, parts))
+        return quote_etag(hashlib.sha1(raw.encode()).hexdigest()[:32], weak=True)
+
+
+def _make_backend():
+    if os.getenv('QUERY_CACHE_BACKEND', 'memory').lower() == 'redis':
+        return RedisVersions(os.getenv('QUERY_CACHE_URL', 'redis://localhost:6379/0'))
+    return MemoryVersions()
+
+
+table_versions = TableVersions(_make_backend(), max_age=float(os.getenv('ETAG_MAX_AGE', '60')))
+
+
+def not_modified(if_none_match, etag):
+    """If-None-Match uses weak comparison, so W/"x" matches "x" and vice versa"""
+    if not if_none_match or etag is None:
+        return False
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith('W/') else candidate) == opaque:
+            return True
+    return False
+
+
+def etag_from(*tables, per_user=False, key=None):
+    """Serve 304 Not Modified for GETs while `tables` are unchanged.
+
+    The ETag covers the path and query string; per_user=True adds the
+    session user, for responses that depend on who is asking (or on their
+    role), and key() anything else the response depends on, such as today's
+    date. Only 200 responses get the ETag.
+    """
+    tables = tuple(sorted(t.lower() for t in tables))
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # Only when this view is serving the request itself, not a dashboard section (fanout.py)
+            if current_app.view_functions.get(request.endpoint) is not wrapper:
+                return view(*args, **kwargs)
+
+            user = session.get('user') or {}
+            identity = (user.get('user_type'), user.get('id')) if per_user else None
+            etag = table_versions.etag(tables, request.full_path, identity, key() if key else None)
+
+            if not_modified(request.headers.get('If-None-Match'), etag):
+                return '', 304, {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if etag is not None and response.status_code == 200:
+                response.headers['ETag'] = etag
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -1,10 +1,16 @@
 from flask import Blueprint, jsonify, session, request
-from db_utils import execute_query
+from db_utils import execute_query, transaction
 import datetime
+from service_reminders import due_for_customer
+from app_logging import get_logger, SAMPLED
+from fanout import fan_out
+from conditional import etag_from
 
 customer_bp = Blueprint('customer', __name__)
+logger = get_logger(__name__)
 
 @customer_bp.route('/vehicles', methods=['GET'])
+@etag_from('Vehicle', 'CustomerOwnVehicle', per_user=True)
 def get_customer_vehicles():
     user = session.get('user')
     if not user or user.get('user_type') != 'customer':
@@ -26,11 +32,11 @@ def get_customer_vehicles():
         if vehicles is None:
             return jsonify({'error': 'Failed to fetch vehicles'}), 500
         
-        print(f"Fetched {len(vehicles)} vehicles for customer {customer_id}")
+        logger.info("Fetched %d vehicles for customer %s", len(vehicles), customer_id, extra=SAMPLED)
         return jsonify({'vehicles': vehicles}), 200
         
-    except Exception as e:
-        print(f"Error in get_customer_vehicles: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_customer_vehicles")
         return jsonify({'error': 'Failed to fetch vehicles'}), 500
 
 
@@ -54,17 +60,18 @@ def get_vehicle_details(vin):
         vehicle = execute_query(query, (vin, customer_id), fetch_one=True)
         
         if vehicle:
-            print(f"Fetched details for vehicle {vin}")
+            logger.info("Fetched details for vehicle %s", vin, extra=SAMPLED)
             return jsonify({'vehicle': vehicle}), 200
         else:
             return jsonify({'error': 'Vehicle not found or not owned by customer'}), 404
             
-    except Exception as e:
-        print(f"Error in get_vehicle_details: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_vehicle_details")
         return jsonify({'error': 'Failed to fetch vehicle details'}), 500
 
 
 @customer_bp.route('/info', methods=['GET'])
+@etag_from('Customer', per_user=True)
 def get_customer_info():
     user = session.get('user')
     if not user or user.get('user_type') != 'customer':
@@ -82,17 +89,18 @@ def get_customer_info():
         customer = execute_query(query, (customer_id,), fetch_one=True)
         
         if customer:
-            print(f"Fetched details for customer {customer_id}")
+            logger.info("Fetched details for customer %s", customer_id, extra=SAMPLED)
             return jsonify({'customer': customer}), 200
         else:
             return jsonify({'error': 'Customer not found'}), 404
             
-    except Exception as e:
-        print(f"Error in get_customer_info: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_customer_info")
         return jsonify({'error': 'Failed to fetch customer details'}), 500
 
 
 @customer_bp.route('/my_sales_orders', methods=['GET'])
+@etag_from('SalesOrder', 'Employee', 'Vehicle', per_user=True)
 def get_my_sales_orders():
     user = session.get('user')
     if not user or user.get('user_type') != 'customer':
@@ -122,13 +130,13 @@ def get_my_sales_orders():
         sales_orders = execute_query(query, (customer_id,))
         
         if sales_orders is not None:
-            print(f"Fetched {len(sales_orders)} sales orders for customer {customer_id}")
+            logger.info("Fetched %d sales orders for customer %s", len(sales_orders), customer_id, extra=SAMPLED)
             return jsonify({'sales_orders': sales_orders}), 200
         else:
             return jsonify({'sales_orders': []}), 200
             
-    except Exception as e:
-        print(f"Error in get_my_sales_orders: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_my_sales_orders")
         return jsonify({'error': 'Failed to fetch sales orders'}), 500
 
 
@@ -148,13 +156,13 @@ def get_employee_details(employee_id):
         employee = execute_query(query, (employee_id,), fetch_one=True)
         
         if employee:
-            print(f"Fetched employee details for employee {employee_id}")
+            logger.info("Fetched employee details for employee %s", employee_id, extra=SAMPLED)
             return jsonify({'employee': employee}), 200
         else:
             return jsonify({'error': 'Employee not found'}), 404
             
-    except Exception as e:
-        print(f"Error in get_employee_details: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_employee_details")
         return jsonify({'error': 'Failed to fetch employee details'}), 500
 
 
@@ -192,11 +200,6 @@ def update_customer_info():
             WHERE ID = %s
         """
         
-        result = execute_query(query, tuple(values))
-        
-        if result is False:
-            return jsonify({'error': 'Failed to update customer info'}), 500
-        
         # Fetch and return updated customer info
         fetch_query = """
             SELECT ID, Name, Phone, Email, Address, Gender, Registration_Date, Closure_Date
@@ -204,20 +207,24 @@ def update_customer_info():
             WHERE ID = %s
         """
         
-        updated_customer = execute_query(fetch_query, (customer_id,), fetch_one=True)
+        # Update and re-read on the same connection
+        with transaction() as tx:
+            tx.execute(query, tuple(values))
+            updated_customer = tx.execute(fetch_query, (customer_id,), fetch_one=True)
         
         if updated_customer:
-            print(f"Updated customer info for customer {customer_id}")
+            logger.info("Updated customer info for customer %s", customer_id)
             return jsonify({'customer': updated_customer}), 200
         else:
             return jsonify({'error': 'Customer not found'}), 404
             
-    except Exception as e:
-        print(f"Error in update_customer_info: {str(e)}")
+    except Exception:
+        logger.exception("Error in update_customer_info")
         return jsonify({'error': 'Failed to update customer info'}), 500
 
 
 @customer_bp.route('/my_service_records', methods=['GET'])
+@etag_from('ServiceOrder', 'Vehicle', 'Employee', per_user=True)
 def get_my_service_records():
     user = session.get('user')
     if not user or user.get('user_type') != 'customer':
@@ -248,17 +255,18 @@ def get_my_service_records():
         service_orders = execute_query(query, (customer_id,))
         
         if service_orders is not None:
-            print(f"Fetched {len(service_orders)} service records for customer {customer_id}")
+            logger.info("Fetched %d service records for customer %s", len(service_orders), customer_id, extra=SAMPLED)
             return jsonify({'service_orders': service_orders}), 200
         else:
             return jsonify({'service_orders': []}), 200
             
-    except Exception as e:
-        print(f"Error in get_my_service_records: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_my_service_records")
         return jsonify({'error': 'Failed to fetch service records'}), 500
 
 
 @customer_bp.route('/vehicles_due_service', methods=['GET'])
+@etag_from('Vehicle', 'CustomerOwnVehicle', 'ServiceOrder', per_user=True, key=datetime.date.today)
 def get_vehicles_due_service():
     user = session.get('user')
     if not user or user.get('user_type') != 'customer':
@@ -267,51 +275,31 @@ def get_vehicles_due_service():
     customer_id = user.get('id')
     
     try:
-        # Get all customer vehicles with their latest service dates
-        query = """
-            SELECT 
-                v.VIN,
-                v.Make,
-                v.Model,
-                v.Year,
-                MAX(so.Date_From) as Last_Service_Date
-            FROM Vehicle v
-            JOIN CustomerOwnVehicle cov ON cov.Vehicle_VIN = v.VIN
-            LEFT JOIN ServiceOrder so ON so.Vehicle_VIN = v.VIN AND so.Customer_ID = %s
-            WHERE cov.Customer_ID = %s
-            GROUP BY v.VIN, v.Make, v.Model, v.Year
-        """
-        
-        vehicles = execute_query(query, (customer_id, customer_id))
-        
-        now = datetime.datetime.now()
-        due_vehicles = []
+        # Evaluated in SQL against SERVICE_INTERVAL_DAYS (default 365)
+        due_vehicles = due_for_customer(customer_id)
         
-        if vehicles:
-            for vehicle in vehicles:
-                last_service = vehicle.get('Last_Service_Date')
-                
-                # Check if vehicle is due (never serviced or last service > 1 year ago)
-                if last_service is None:
-                    due_vehicles.append(vehicle)
-                else:
-                    try:
-                        # Handle both string and datetime formats
-                        if isinstance(last_service, str):
-                            last_service_date = datetime.datetime.strptime(last_service, '%Y-%m-%d')
-                        else:
-                            last_service_date = last_service
-                        
-                        days_since_service = (now - last_service_date).days
-                        if days_since_service > 365:
-                            due_vehicles.append(vehicle)
-                    except Exception:
-                        # If date parsing fails, consider it due
-                        due_vehicles.append(vehicle)
-        
-        print(f"Found {len(due_vehicles)} vehicles due for service for customer {customer_id}")
+        logger.info("Found %d vehicles due for service for customer %s", len(due_vehicles), customer_id, extra=SAMPLED)
         return jsonify({'due_vehicles': due_vehicles}), 200
         
-    except Exception as e:
-        print(f"Error in get_vehicles_due_service: {str(e)}")
-        return jsonify({'error': 'Failed to check service due vehicles'}), 500
\ No newline at end of file
+    except Exception:
+        logger.exception("Error in get_vehicles_due_service")
+        return jsonify({'error': 'Failed to check service due vehicles'}), 500
+
+
+@customer_bp.route('/dashboard', methods=['GET'])
+@etag_from('Customer', 'Vehicle', 'CustomerOwnVehicle', 'SalesOrder', 'ServiceOrder', 'Employee',
+           per_user=True, key=datetime.date.today)
+def get_dashboard():
+    """Everything the customer page loads, fetched concurrently in one request"""
+    user = session.get('user')
+    if not user or user.get('user_type') != 'customer':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    dashboard = fan_out({
+        'info': get_customer_info,
+        'vehicles': get_customer_vehicles,
+        'sales_orders': get_my_sales_orders,
+        'service_records': get_my_service_records,
+        'due_service': get_vehicles_due_service,
+    })
+    return jsonify(dashboard), 200
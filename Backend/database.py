@@ -1,7 +1,9 @@
 from flask import Blueprint
-import mysql.connector
 import os
 from dotenv import load_dotenv
+import time
+from db_pool import ConnectionPool
+from metrics import record_connection_wait
 
 load_dotenv()
 
@@ -12,7 +14,26 @@ db_config = {
     'database': os.getenv('DB_NAME'),
 }
 
+# Pool sizing is per process; under gunicorn every worker gets its own pool
+pool_config = {
+    'size': int(os.getenv('DB_POOL_SIZE', '5')),
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', '10')),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+    'recycle': float(os.getenv('DB_POOL_RECYCLE', '3600')),
+    'pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+}
+
+pool = ConnectionPool(db_config, **pool_config)
+
 auth_bp = Blueprint('auth', __name__)
 
 def get_db_connection():
-    return mysql.connector.connect(**db_config)
\ No newline at end of file
+    # Callers keep using conn.close(); on a pooled connection that returns it to the pool
+    start = time.perf_counter()
+    conn = pool.acquire()
+    record_connection_wait(time.perf_counter() - start)
+    return conn
+
+
+def get_pool_stats():
+    return pool.stats()
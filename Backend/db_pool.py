@@ -0,0 +1,214 @@
+import os
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class PooledConnection:
+    """Thin wrapper around a MySQL connection that returns it to the pool on close()"""
+
+    def __init__(self, pool, conn, created_at):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def raw_connection(self):
+        return self._conn
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        self._pool.release(self._conn, self._created_at)
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections.
+
+    `size` connections are kept idle between requests; up to `max_overflow`
+    extra connections may be opened under load and are closed when returned.
+    Idle connections older than `recycle` seconds are replaced, and with
+    `pre_ping` every checkout is verified before it is handed out.
+    """
+
+    def __init__(self, config, size=5, max_overflow=10, timeout=30, recycle=3600, pre_ping=True):
+        self.config = dict(config)
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._reset_state()
+
+        # gunicorn forks workers after import; each worker must own its own pool
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # The parent's lock may have been held mid-checkout when we forked
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._reset_state()
+
+    def _reset_state(self):
+        # Connections (and sockets) inherited across fork belong to the parent
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._checked_out = 0
+        self._stats = {
+            'created': 0,
+            'closed': 0,
+            'recycled': 0,
+            'ping_failures': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+        }
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            # Drop the parent's connections without closing them, closing
+            # would send COM_QUIT on a socket the parent is still using
+            self._reset_state()
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self.config)
+        with self._lock:
+            self._stats['created'] += 1
+        return conn, time.monotonic()
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats['closed'] += 1
+
+    def _is_healthy(self, conn, created_at):
+        if self.recycle is not None and time.monotonic() - created_at > self.recycle:
+            with self._lock:
+                self._stats['recycled'] += 1
+            return False
+        if self.pre_ping:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                with self._lock:
+                    self._stats['ping_failures'] += 1
+                return False
+        return True
+
+    def acquire(self):
+        """Check out a connection, waiting up to `timeout` seconds if the pool is exhausted"""
+        start = time.monotonic()
+        waited = False
+
+        with self._lock:
+            self._check_pid()
+            while True:
+                if self._idle:
+                    conn, created_at = self._idle.pop()
+                    self._checked_out += 1
+                    break
+                if self._checked_out < self.size + self.max_overflow:
+                    conn, created_at = None, None
+                    self._checked_out += 1
+                    break
+
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"Connection pool exhausted ({self._checked_out} checked out)"
+                    )
+                waited = True
+                self._available.wait(remaining)
+
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+                self._stats['wait_time_total'] += time.monotonic() - start
+
+        # Connect and ping outside the lock so slow handshakes don't serialize checkouts
+        try:
+            if conn is not None and not self._is_healthy(conn, created_at):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn, created_at = self._connect()
+        except Exception:
+            with self._lock:
+                self._checked_out -= 1
+                self._available.notify()
+            raise
+
+        return PooledConnection(self, conn, created_at)
+
+    def release(self, conn, created_at):
+        """Return a connection to the pool, closing it if the pool is already full"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Checked out by the parent before fork, not ours to reuse
+                return
+
+        keep = True
+        try:
+            if conn.unread_result:
+                conn.consume_results()
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            keep = False
+
+        with self._lock:
+            self._checked_out -= 1
+            if keep and len(self._idle) < self.size:
+                self._idle.append((conn, created_at))
+                conn = None
+            self._available.notify()
+
+        if conn is not None:
+            self._discard(conn)
+
+    def dispose(self):
+        """Close every idle connection; checked-out connections close on release"""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            self._check_pid()
+            stats = dict(self._stats)
+            stats.update({
+                'pid': self._pid,
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+            })
+        return stats
@@ -1,161 +1,538 @@
-from database import get_db_connection
+import csv
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+import mysql.connector
+from database import get_db_connection, db_config
+from schema_cache import schema_catalog
+from query_cache import query_cache, tables_in, is_write, with_derived
+from conditional import table_versions
+from metrics import record_query
+from slow_query_log import slow_query_log
+from json_provider import TupleRows
+from query_builder import TableQuery
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+class RowView(Mapping):
+    """Read-only mapping over one tuple row; row['Price'] works like a dict row"""
+
+    __slots__ = ('_index', '_values')
+
+    def __init__(self, index, values):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._index[key]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        return f"RowView({dict(self)!r})"
+
+
+class Rows(TupleRows, Sequence):
+    """Compact query result: column names once, rows as tuples.
+
+    Indexing and iteration give RowView mappings, created on access, so
+    read-only callers written for dict rows work unchanged. The JSON provider
+    encodes it straight from the tuples. Use .dicts() when rows must be mutable.
+    """
+
+    __slots__ = ('_index',)
+
+    def __init__(self, columns, rows):
+        super().__init__(columns, rows)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return Rows(self.columns, self.rows[i])
+        return RowView(self._index, self.rows[i])
+
+    def __iter__(self):
+        index = self._index
+        for row in self.rows:
+            yield RowView(index, row)
+
+    def __reduce__(self):
+        return (Rows, (self.columns, self.rows))
+
+    def __repr__(self):
+        return f"Rows({len(self.rows)} rows, columns={list(self.columns)})"
+
+    def column(self, name):
+        i = self._index[name]
+        return [row[i] for row in self.rows]
+
+    def dicts(self):
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
 
 def get_primary_key(table_name):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = """
-            SELECT COLUMN_NAME
-            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-            WHERE TABLE_NAME = %s
-              AND CONSTRAINT_NAME = 'PRIMARY'
-        """
-        
-        cursor.execute(query, (table_name,))
-        result = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
-        return result['COLUMN_NAME'] if result else None
+        # Served from the in-memory schema catalog, see schema_cache.py
+        pk = schema_catalog.primary_key(table_name)
+        return pk[0] if pk else None
         
-    except Exception as e:
-        print(f"Error getting primary key for {table_name}: {str(e)}")
+    except Exception:
+        logger.exception("Error getting primary key for %s", table_name)
         return None
 
 
 def get_all_tables(database_name):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        if database_name == schema_catalog.schema:
+            return schema_catalog.table_names()
+
+        # Other schemas aren't cached
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
         
-        query = """
-            SELECT TABLE_NAME
-            FROM INFORMATION_SCHEMA.TABLES
-            WHERE TABLE_SCHEMA = %s
-        """
+            query = """
+                SELECT TABLE_NAME
+                FROM INFORMATION_SCHEMA.TABLES
+                WHERE TABLE_SCHEMA = %s
+            """
         
-        cursor.execute(query, (database_name,))
-        tables = [row[0] for row in cursor.fetchall()]
+            cursor.execute(query, (database_name,))
+            tables = [row[0] for row in cursor.fetchall()]
         
-        cursor.close()
-        conn.close()
+            cursor.close()
         
         return tables
         
-    except Exception as e:
-        print(f"Error getting tables: {str(e)}")
+    except Exception:
+        logger.exception("Error getting tables")
         return []
 
 
-def get_table_data(table_name, where_clause=None, where_params=None, order_by=None):
+# Prepared statements kept open per pooled connection (LRU); the server caps
+# the total across all connections with max_prepared_stmt_count
+PREPARED_CACHE_SIZE = int(os.getenv('DB_PREPARED_CACHE_SIZE', '64'))
+
+
+def _prepared_cursor(conn, sql):
+    """Return (cursor, sql) from the connection's prepared statement cache.
+
+    mysql-connector re-prepares unless execute() gets the *same* string
+    object it saw last time, so the cached sql object is returned for reuse.
+    """
+    raw = conn.raw_connection
+    cache = getattr(raw, 'prepared_cache', None)
+    if cache is None:
+        cache = raw.prepared_cache = OrderedDict()
+
+    entry = cache.get(sql)
+    if entry is not None:
+        cache.move_to_end(sql)
+        return entry
+
+    entry = (raw.cursor(prepared=True), sql)
+    cache[sql] = entry
+    if len(cache) > PREPARED_CACHE_SIZE:
+        _, (cursor, _) = cache.popitem(last=False)
+        cursor.close()
+    return entry
+
+
+def _drop_prepared(conn, sql):
+    cache = getattr(conn.raw_connection, 'prepared_cache', None)
+    entry = cache.pop(sql, None) if cache else None
+    if entry is not None:
+        try:
+            entry[0].close()
+        except Exception:
+            pass
+
+
+def execute_prepared(sql, params=(), compact=False):
+    """Run a read through a cached server-side prepared statement. Raises on error."""
+    with get_db_connection() as conn:
+        start = time.perf_counter()
+        try:
+            cursor, stmt = _prepared_cursor(conn, sql)
+            cursor.execute(stmt, params)
+            rows = cursor.fetchall()
+        except mysql.connector.Error:
+            # The statement may be gone server-side (e.g. after a reconnect); prepare it afresh once
+            _drop_prepared(conn, sql)
+            cursor, stmt = _prepared_cursor(conn, sql)
+            cursor.execute(stmt, params)
+            rows = cursor.fetchall()
+        elapsed = time.perf_counter() - start
+        record_query(elapsed, len(rows))
+        slow_query_log.record(conn, sql, params, elapsed, len(rows))
+        result = Rows(cursor.column_names, rows)
+
+    return result if compact else result.dicts()
+
+
+def get_table_data(table_name, where_clause=None, where_params=None, order_by=None,
+                   compact=False, limit=None, offset=None):
+    """SELECT * from one table via TableQuery and a prepared statement.
+
+    where_clause is either {column: value} (None -> IS NULL, list -> IN) or a
+    constant SQL fragment with %s placeholders filled from where_params.
+    order_by is "Column [ASC|DESC], ..." and is validated against the schema.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Build query dynamically
-        query = f"SELECT * FROM {table_name}"
-        
-        if where_clause:
-            query += f" WHERE {where_clause}"
-            
+        query = TableQuery(table_name)
+        if isinstance(where_clause, dict):
+            query.where_equal(where_clause)
+        elif where_clause:
+            query.where_sql(where_clause, where_params)
         if order_by:
-            query += f" ORDER BY {order_by}"
-        
-        # Execute with or without parameters
-        if where_params:
-            cursor.execute(query, where_params)
-        else:
-            cursor.execute(query)
-            
-        rows = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
-        return rows
+            query.order_by_spec(order_by)
+        if limit is not None:
+            query.limit(limit, offset)
+
+        sql, params = query.build()
+        return execute_prepared(sql, params, compact=compact)
         
-    except Exception as e:
-        print(f"Error getting data from {table_name}: {str(e)}")
+    except Exception:
+        logger.exception("Error getting data from %s", table_name)
         return []
 
 
 def get_table_columns(table_name):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = """
-            SELECT COLUMN_NAME, DATA_TYPE, IS_NULLABLE, COLUMN_KEY
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_NAME = %s
-            ORDER BY ORDINAL_POSITION
-        """
-        
-        cursor.execute(query, (table_name,))
-        columns = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        return schema_catalog.columns(table_name)
         
-        return columns
-        
-    except Exception as e:
-        print(f"Error getting columns for {table_name}: {str(e)}")
+    except Exception:
+        logger.exception("Error getting columns for %s", table_name)
         return []
 
 
 def get_foreign_keys(table_name):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        return schema_catalog.foreign_keys(table_name)
         
-        query = """
-            SELECT COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
-            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-            WHERE TABLE_SCHEMA = DATABASE() 
-            AND TABLE_NAME = %s
-            AND REFERENCED_TABLE_NAME IS NOT NULL
-        """
+    except Exception:
+        logger.exception("Error getting foreign keys for %s", table_name)
+        return []
+
+
+def _tables_changed(tables):
+    tables = with_derived(tables)
+    # Evict first: a reader that sees the new version must not get the old cached rows
+    query_cache.invalidate_tables(tables)
+    table_versions.bump(tables)
+
+
+def execute_query(query, params=None, fetch_one=False, cache_ttl=None, compact=False,
+                  raise_errors=False):
+    # cache_ttl (seconds) opts a read into the shared result cache; writes
+    # always evict cached results for the tables they touch.
+    # compact=True returns Rows (tuples + lazy dict views) instead of a list of dicts.
+    # Errors are logged and give [] / None, unless raise_errors=True, for callers
+    # that can't tell an empty result from a failed query
+    write = is_write(query)
+    use_cache = cache_ttl is not None and not write and query_cache.enabled
+    if use_cache:
+        cache_key = query_cache.make_key(query, params, fetch_one, compact)
+        cached = query_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    try:
+        # Always hand the connection back to the pool, even when the query fails
+        with get_db_connection() as conn:
+            # Buffered so fetch_one doesn't leave unread rows on a reused connection
+            cursor = conn.cursor(dictionary=not compact, buffered=True)
+            start = time.perf_counter()
         
-        cursor.execute(query, (table_name,))
-        foreign_keys = cursor.fetchall()
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            if write:
+                conn.commit()
+
+            if fetch_one:
+                result = cursor.fetchone()
+            else:
+                result = cursor.fetchall()
+            if compact and cursor.with_rows:
+                if fetch_one:
+                    result = Rows(cursor.column_names, [result])[0] if result is not None else None
+                else:
+                    result = Rows(cursor.column_names, result)
+
+            # Buffered cursor: rowcount is rows returned (reads) or affected (writes)
+            elapsed = time.perf_counter() - start
+            rows = max(cursor.rowcount, 0)
+            record_query(elapsed, rows)
         
-        cursor.close()
-        conn.close()
+            cursor.close()
+            slow_query_log.record(conn, query, params, elapsed, rows)
+
+        if write:
+            _tables_changed(tables_in(query))
+        elif use_cache and result is not None:
+            query_cache.set(cache_key, result, tables_in(query), cache_ttl)
         
-        return foreign_keys
+        return result
+
         
-    except Exception as e:
-        print(f"Error getting foreign keys for {table_name}: {str(e)}")
-        return []
+    except Exception:
+        if raise_errors:
+            raise
+        logger.exception("Error executing query")
+        return None if fetch_one else []
 
 
-def execute_query(query, params=None, fetch_one=False):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
+class Transaction:
+    """Runs several statements on one pooled connection; see transaction()"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor(dictionary=True, buffered=True)
+        self.rowcount = 0
+        self.lastrowid = None
+        self.written_tables = set()
+
+    def execute(self, query, params=None, fetch_one=False, for_update=False):
+        # for_update takes row locks that are held until the transaction ends
+        if for_update:
+            query = query.rstrip().rstrip(';') + " FOR UPDATE"
+
+        start = time.perf_counter()
         if params:
-            cursor.execute(query, params)
+            self.cursor.execute(query, params)
         else:
-            cursor.execute(query)
-            
-        if query.strip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
-            conn.commit()
+            self.cursor.execute(query)
 
+        self.rowcount = self.cursor.rowcount
+        self.lastrowid = self.cursor.lastrowid
+        if is_write(query):
+            self.written_tables |= tables_in(query)
+
+        if not self.cursor.with_rows:
+            record_query(time.perf_counter() - start, max(self.rowcount, 0))
+            return None
         if fetch_one:
-            result = cursor.fetchone()
+            result = self.cursor.fetchone()
         else:
-            result = cursor.fetchall()
-        
+            result = self.cursor.fetchall()
+        record_query(time.perf_counter() - start, max(self.cursor.rowcount, 0))
+        return result
+
+
+@contextmanager
+def transaction():
+    """Commit every statement in the block together, or roll all of them back.
+
+    Unlike execute_query, errors are raised to the caller after the rollback.
+
+        with transaction() as tx:
+            row = tx.execute("SELECT ... WHERE ID = %s", (id,), fetch_one=True, for_update=True)
+            tx.execute("INSERT ...", params)
+    """
+    with get_db_connection() as conn:
+        conn.start_transaction()
+        tx = Transaction(conn)
+        try:
+            yield tx
+            conn.commit()
+            _tables_changed(tx.written_tables)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            tx.cursor.close()
+
+
+def stream_query(query, params=None, batch_size=500):
+    """Yield rows from an unbuffered cursor, fetching `batch_size` at a time.
+
+    The pooled connection is held until the generator is exhausted or closed,
+    so consume it fully (or close it) within the request.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        # DB time is the execute plus each fetch; time spent by the consumer
+        # between batches is not counted
+        db_time = 0.0
+        count = 0
+        try:
+            start = time.perf_counter()
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            db_time += time.perf_counter() - start
+
+            while True:
+                start = time.perf_counter()
+                rows = cursor.fetchmany(batch_size)
+                db_time += time.perf_counter() - start
+                if not rows:
+                    break
+                count += len(rows)
+                yield from rows
+        finally:
+            record_query(db_time, count)
+            # Abandoned mid-stream: drain the rest so the connection can be reused
+            if conn.unread_result:
+                conn.consume_results()
+            cursor.close()
+            slow_query_log.record(conn, query, params, db_time, count)
+
+
+def table_load_order(tables):
+    """Order tables so every table comes after the tables its foreign keys reference"""
+    tables = list(tables)
+    pending = set(tables)
+    deps = {
+        table: {fk['REFERENCED_TABLE_NAME'] for fk in get_foreign_keys(table)} & pending - {table}
+        for table in tables
+    }
+
+    ordered = []
+    while pending:
+        ready = [t for t in tables if t in pending and not deps[t] & pending]
+        if not ready:
+            raise ValueError(f"Circular foreign keys between: {', '.join(sorted(pending))}")
+        ordered.extend(ready)
+        pending -= set(ready)
+    return ordered
+
+
+def _csv_columns(table_name, header):
+    # Match CSV headers to real column names (case-insensitive) using the schema catalog
+    columns = {col['COLUMN_NAME'].lower(): col for col in get_table_columns(table_name)}
+    if not columns:
+        raise ValueError(f"Unknown table {table_name}")
+
+    unknown = [name for name in header if name.strip().lower() not in columns]
+    if unknown:
+        raise ValueError(f"{table_name} has no column(s): {', '.join(unknown)}")
+    return [columns[name.strip().lower()] for name in header]
+
+
+def bulk_load_csv(table_name, csv_path, batch_size=1000, use_load_data=False):
+    """Insert every row of a CSV (header row = column names) into table_name.
+
+    Rows are streamed from the file and sent with executemany() in batches of
+    batch_size, each batch committed on its own. use_load_data=True hands the
+    file to the server with LOAD DATA LOCAL INFILE instead, which is faster but
+    needs local_infile enabled on the server. Empty fields become NULL for
+    nullable columns. Returns row count and throughput.
+    """
+    start = time.perf_counter()
+
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            raise ValueError(f"{csv_path} is empty")
+        columns = _csv_columns(table_name, header)
+        names = ', '.join(f"`{col['COLUMN_NAME']}`" for col in columns)
+
+        if use_load_data:
+            rows = _load_data_infile(table_name, csv_path, columns)
+        else:
+            nullable = [col['IS_NULLABLE'] == 'YES' for col in columns]
+            query = (f"INSERT INTO `{table_name}` ({names}) "
+                     f"VALUES ({', '.join(['%s'] * len(columns))})")
+            rows = 0
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                batch = []
+                for record in reader:
+                    if len(record) != len(columns):
+                        raise ValueError(f"{csv_path} line {reader.line_num}: "
+                                         f"expected {len(columns)} fields, got {len(record)}")
+                    batch.append(tuple(
+                        None if (value == '' and is_nullable) else value
+                        for value, is_nullable in zip(record, nullable)
+                    ))
+                    if len(batch) >= batch_size:
+                        cursor.executemany(query, batch)
+                        conn.commit()
+                        rows += len(batch)
+                        batch = []
+                if batch:
+                    cursor.executemany(query, batch)
+                    conn.commit()
+                    rows += len(batch)
+                cursor.close()
+
+    _tables_changed({table_name.lower()})
+
+    seconds = time.perf_counter() - start
+    stats = {
+        'table': table_name,
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None,
+    }
+    return stats
+
+
+def _load_data_infile(table_name, csv_path, columns):
+    # LOAD DATA LOCAL needs a connection opened with allow_local_infile, so it
+    # doesn't come from the shared pool
+    targets = []
+    assignments = []
+    for i, col in enumerate(columns):
+        if col['IS_NULLABLE'] == 'YES':
+            targets.append(f"@v{i}")
+            assignments.append(f"`{col['COLUMN_NAME']}` = NULLIF(@v{i}, '')")
+        else:
+            targets.append(f"`{col['COLUMN_NAME']}`")
+
+    with open(csv_path, 'rb') as f:
+        line_end = '\\r\\n' if f.readline().endswith(b'\r\n') else '\\n'
+
+    query = f"""
+        LOAD DATA LOCAL INFILE %s
+        INTO TABLE `{table_name}`
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+        LINES TERMINATED BY '{line_end}'
+        IGNORE 1 LINES
+        ({', '.join(targets)})
+    """
+    if assignments:
+        query += f" SET {', '.join(assignments)}"
+
+    conn = mysql.connector.connect(**db_config, allow_local_infile=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, (os.path.abspath(csv_path),))
+        rows = cursor.rowcount
+        conn.commit()
         cursor.close()
+    finally:
         conn.close()
-        
-        return result
+    return rows
 
-        
-    except Exception as e:
-        print(f"Error executing query: {str(e)}")
-        return None if fetch_one else []
\ No newline at end of file
+
+def bulk_load_directory(directory, batch_size=1000, use_load_data=False):
+    """Load every <Table>.csv in directory, parents before children"""
+    known = {name.lower(): name for name in get_all_tables(schema_catalog.schema)}
+    files = {}
+    for filename in os.listdir(directory):
+        stem, ext = os.path.splitext(filename)
+        if ext.lower() != '.csv':
+            continue
+        if stem.lower() not in known:
+            raise ValueError(f"{filename} doesn't match any table")
+        files[known[stem.lower()]] = os.path.join(directory, filename)
+
+    results = []
+    for table in table_load_order(files):
+        results.append(bulk_load_csv(table, files[table], batch_size, use_load_data))
+    return results
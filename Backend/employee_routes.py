@@ -1,9 +1,16 @@
-from flask import Blueprint, jsonify, session
-from db_utils import execute_query
+from flask import Blueprint, jsonify, session, request
+from db_utils import execute_query, stream_query, transaction
+from sales_rollup import move_sale
+from streaming import stream_rows
+import datetime
+from app_logging import get_logger, SAMPLED
+from conditional import etag_from
 
 employee_bp = Blueprint('employee', __name__)
+logger = get_logger(__name__)
 
 @employee_bp.route('/employees', methods=['GET'])
+@etag_from('Employee', per_user=True)
 def get_employees():
     user = session.get('user')
     if not user or user.get('user_type') not in ('employee', 'manager'):
@@ -16,55 +23,122 @@ def get_employees():
             ORDER BY ID
         """
 
-        employees = execute_query(query)
+        employees = execute_query(query, cache_ttl=300)
 
         if employees:
-            print("Fetched all employees")
+            logger.info("Fetched all employees", extra=SAMPLED)
             return jsonify({'employees': employees}), 200
         else:
             return jsonify({'error': 'Employees not found'}), 404
             
-    except Exception as e:
-        print(f"Error in get_employees: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_employees")
         return jsonify({'error': 'Failed to fetch employees'}), 500
 
 
+SALES_ORDERS_PAGE_SIZE = 50
+SALES_ORDERS_MAX_PAGE_SIZE = 200
+
+
+def sales_orders_query(args):
+    """Build the /sales_orders SELECT from query args -> (query, params, limit).
+    Raises ValueError with a client-facing message. Shared with asgi.py.
+    """
+    conditions = []
+    params = []
+
+    try:
+        limit = int(args.get('limit', SALES_ORDERS_PAGE_SIZE))
+        limit = max(1, min(limit, SALES_ORDERS_MAX_PAGE_SIZE))
+
+        # Keyset on so.ID: each page continues below the last ID of the previous one
+        if args.get('after'):
+            conditions.append("so.ID < %s")
+            params.append(int(args['after']))
+        if args.get('employee_id'):
+            conditions.append("so.Sales_Employee_ID = %s")
+            params.append(int(args['employee_id']))
+        if args.get('customer_id'):
+            conditions.append("so.Customer_ID = %s")
+            params.append(int(args['customer_id']))
+        if args.get('date_from'):
+            conditions.append("so.Sales_Date >= %s")
+            params.append(datetime.date.fromisoformat(args['date_from']))
+        if args.get('date_to'):
+            conditions.append("so.Sales_Date <= %s")
+            params.append(datetime.date.fromisoformat(args['date_to']))
+    except ValueError:
+        raise ValueError('Invalid filter or paging parameter') from None
+
+    status = args.get('status')
+    if status == 'assigned':
+        conditions.append("so.Sales_Employee_ID IS NOT NULL")
+    elif status == 'unassigned':
+        conditions.append("so.Sales_Employee_ID IS NULL")
+    elif status:
+        raise ValueError('Invalid status')
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # Fetch one extra row to know whether another page exists
+    query = f"""
+        SELECT 
+            so.ID,
+            so.Sales_Date,
+            so.Price,
+            so.Vehicle_VIN,
+            so.Sales_Employee_ID,
+            c.Name as Customer_Name,
+            e.Name as Sales_Employee_Name,
+            v.Make,
+            v.Model,
+            v.Year
+        FROM SalesOrder so
+        JOIN Customer c ON so.Customer_ID = c.ID
+        LEFT JOIN Employee e ON so.Sales_Employee_ID = e.ID
+        LEFT JOIN Vehicle v ON so.Vehicle_VIN = v.VIN
+        {where}
+        ORDER BY so.ID DESC
+        LIMIT %s
+    """
+    params.append(limit + 1)
+    return query, tuple(params), limit
+
+
+def sales_orders_page(sales_orders, limit):
+    """Trim the extra row fetched by sales_orders_query and build the response body"""
+    next_cursor = None
+    if len(sales_orders) > limit:
+        sales_orders = sales_orders[:limit]
+        next_cursor = sales_orders[-1]['ID']
+    return {'sales_orders': sales_orders, 'next_cursor': next_cursor}
+
+
 @employee_bp.route('/sales_orders', methods=['GET'])
 def get_sales_orders():
+    """List sales orders newest first, one page at a time.
+    Query params: limit, after (next_cursor from the previous page),
+    date_from, date_to (YYYY-MM-DD), employee_id, customer_id,
+    status=assigned|unassigned
+    """
     user = session.get('user')
     if not user or user.get('user_type') not in ('employee', 'manager'):
         return jsonify({'error': 'Unauthorized'}), 401
-    
+
     try:
-        query = """
-            SELECT 
-                so.ID,
-                so.Sales_Date,
-                so.Price,
-                so.Vehicle_VIN,
-                so.Sales_Employee_ID,
-                c.Name as Customer_Name,
-                e.Name as Sales_Employee_Name,
-                v.Make,
-                v.Model,
-                v.Year
-            FROM SalesOrder so
-            JOIN Customer c ON so.Customer_ID = c.ID
-            LEFT JOIN Employee e ON so.Sales_Employee_ID = e.ID
-            LEFT JOIN Vehicle v ON so.Vehicle_VIN = v.VIN
-            ORDER BY so.ID DESC
-        """
+        query, params, limit = sales_orders_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        sales_orders = execute_query(query)
+    try:
+        sales_orders = execute_query(query, params, compact=True)
+        page = sales_orders_page(sales_orders, limit)
 
-        if sales_orders:
-            print("Fetched all sales orders")
-            return jsonify({'sales_orders': sales_orders}), 200
-        else:
-            return jsonify({'error': 'Sales orders not found'}), 404
+        logger.info("Fetched %d sales orders", len(page['sales_orders']), extra=SAMPLED)
+        return jsonify(page), 200
             
-    except Exception as e:
-        print(f"Error in get_sales_orders: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_sales_orders")
         return jsonify({'error': 'Failed to fetch sales orders'}), 500
 
 
@@ -97,13 +171,13 @@ def get_my_sales_orders():
         sales_orders = execute_query(query, (employee_id,))
         
         if sales_orders is not None:
-            print(f"Fetched {len(sales_orders)} sales orders for employee {employee_id}")
+            logger.info("Fetched %d sales orders for employee %s", len(sales_orders), employee_id, extra=SAMPLED)
             return jsonify({'sales_orders': sales_orders}), 200
         else:
             return jsonify({'sales_orders': []}), 200
             
-    except Exception as e:
-        print(f"Error in get_my_sales_orders: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_my_sales_orders")
         return jsonify({'error': 'Failed to fetch sales orders'}), 500
 
 
@@ -114,18 +188,29 @@ def assign_employee(employee_ID, sales_order_ID):
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        query = """
-            UPDATE SalesOrder
-            SET Sales_Employee_ID = %s
-            WHERE ID = %s
-        """
-        
-        result = execute_query(query, (employee_ID, sales_order_ID))
+        # Lock the order so the rollup moves the sale from the employee it really had
+        with transaction() as tx:
+            order = tx.execute(
+                "SELECT Sales_Date, Price, Sales_Employee_ID FROM SalesOrder WHERE ID = %s",
+                (sales_order_ID,),
+                fetch_one=True,
+                for_update=True
+            )
+            if not order:
+                return jsonify({'error': 'Sales order not found'}), 404
+
+            query = """
+                UPDATE SalesOrder
+                SET Sales_Employee_ID = %s
+                WHERE ID = %s
+            """
+            tx.execute(query, (employee_ID, sales_order_ID))
+            move_sale(tx, order, employee_ID)
 
         return jsonify({'message': 'Employee assigned successfully'}), 200
             
-    except Exception as e:
-        print(f"Error in assign_employee: {str(e)}")
+    except Exception:
+        logger.exception("Error in assign_employee")
         return jsonify({'error': 'Failed to assign employee'}), 500
 
 
@@ -145,13 +230,13 @@ def get_customer_details(customer_id):
         customer = execute_query(query, (customer_id,), fetch_one=True)
         
         if customer:
-            print(f"Fetched customer details for customer {customer_id}")
+            logger.info("Fetched customer details for customer %s", customer_id, extra=SAMPLED)
             return jsonify({'customer': customer}), 200
         else:
             return jsonify({'error': 'Customer not found'}), 404
             
-    except Exception as e:
-        print(f"Error in get_customer_details: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_customer_details")
         return jsonify({'error': 'Failed to fetch customer details'}), 500
 
 
@@ -171,13 +256,13 @@ def get_vehicle_details(vin):
         vehicle = execute_query(query, (vin,), fetch_one=True)
         
         if vehicle:
-            print(f"Fetched vehicle details for VIN {vin}")
+            logger.info("Fetched vehicle details for VIN %s", vin, extra=SAMPLED)
             return jsonify({'vehicle': vehicle}), 200
         else:
             return jsonify({'error': 'Vehicle not found'}), 404
             
-    except Exception as e:
-        print(f"Error in get_vehicle_details: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_vehicle_details")
         return jsonify({'error': 'Failed to fetch vehicle details'}), 500
 
 
@@ -206,8 +291,8 @@ def get_sales_by_vehicle(vin):
         rows = execute_query(query, (vin,))
         return jsonify({'sales_orders': rows or []}), 200
 
-    except Exception as e:
-        print(f"Error in get_sales_by_vehicle: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_sales_by_vehicle")
         return jsonify({'error': 'Failed to fetch sales for vehicle'}), 500
 
 
@@ -238,11 +323,81 @@ def get_sales_by_customer(customer_id):
         rows = execute_query(query, (customer_id,))
         return jsonify({'sales_orders': rows or []}), 200
 
-    except Exception as e:
-        print(f"Error in get_sales_by_customer: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_sales_by_customer")
         return jsonify({'error': 'Failed to fetch sales for customer'}), 500
 
 
+SERVICE_NEST_BATCH_SIZE = 200
+
+
+def _nest_service_orders(orders):
+    """Yield service orders with their lines and each line's parts nested inside.
+    Children are fetched with one IN (...) query per level for every batch of orders,
+    instead of one flattened row per order x line x part.
+    """
+    batch = []
+    for order in orders:
+        batch.append(order)
+        if len(batch) >= SERVICE_NEST_BATCH_SIZE:
+            yield from _attach_service_lines(batch)
+            batch = []
+    if batch:
+        yield from _attach_service_lines(batch)
+
+
+def _attach_service_lines(orders):
+    # A failed child fetch must fail the request, not report orders with no lines
+    order_ids = [order['ID'] for order in orders]
+    lines = execute_query(
+        f"""
+            SELECT 
+                ID,
+                Service_Order_ID,
+                Service_Type as service_type,
+                Labor_Hours as labor_hours,
+                Labor_Rate as labor_rate
+            FROM ServiceLine
+            WHERE Service_Order_ID IN ({', '.join(['%s'] * len(order_ids))})
+            ORDER BY ID
+        """,
+        tuple(order_ids),
+        raise_errors=True
+    )
+
+    parts_by_line = {}
+    if lines:
+        line_ids = [line['ID'] for line in lines]
+        parts = execute_query(
+            f"""
+                SELECT 
+                    slup.Service_Line_ID,
+                    p.ID as part_id,
+                    p.Name as part_name,
+                    p.Price as part_price,
+                    slup.Quantity as part_quantity
+                FROM ServiceLineUsePart slup
+                JOIN Part p ON slup.Part_ID = p.ID
+                WHERE slup.Service_Line_ID IN ({', '.join(['%s'] * len(line_ids))})
+                ORDER BY p.ID
+            """,
+            tuple(line_ids),
+            raise_errors=True
+        )
+        for part in parts:
+            line_id = part.pop('Service_Line_ID')
+            parts_by_line.setdefault(line_id, []).append(part)
+
+    lines_by_order = {}
+    for line in lines:
+        order_id = line.pop('Service_Order_ID')
+        line['parts'] = parts_by_line.get(line['ID'], [])
+        lines_by_order.setdefault(order_id, []).append(line)
+
+    for order in orders:
+        yield dict(order, lines=lines_by_order.get(order['ID'], []))
+
+
 @employee_bp.route('/service/vehicle/<vin>', methods=['GET'])
 def get_service_by_vehicle(vin):
     user = session.get('user')
@@ -258,27 +413,18 @@ def get_service_by_vehicle(vin):
                 so.Service_Status,
                 so.Price,
                 so.Vehicle_VIN,
-                e.Name as assigned_employee,
-                sl.Service_Type as service_type,
-                sl.Labor_Hours as labor_hours,
-                sl.Labor_Rate as labor_rate,
-                p.Name as part_name,
-                p.Price as part_price,
-                slup.Quantity as part_quantity
+                e.Name as assigned_employee
             FROM ServiceOrder so
             LEFT JOIN Employee e ON so.Service_Advisor_ID = e.ID
-            LEFT JOIN ServiceLine sl ON so.ID = sl.Service_Order_ID
-            LEFT JOIN ServiceLineUsePart slup ON sl.ID = slup.Service_Line_ID
-            LEFT JOIN Part p ON slup.Part_ID = p.ID
             WHERE so.Vehicle_VIN = %s
             ORDER BY so.Date_From DESC, so.ID DESC
         """
 
         rows = execute_query(query, (vin,))
-        return jsonify({'service_orders': rows or []}), 200
+        return jsonify({'service_orders': list(_nest_service_orders(rows or []))}), 200
 
-    except Exception as e:
-        print(f"Error in get_service_by_vehicle: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_service_by_vehicle")
         return jsonify({'error': 'Failed to fetch service for vehicle'}), 500
 
 
@@ -298,28 +444,19 @@ def get_service_by_customer(customer_id):
                 so.Price,
                 so.Vehicle_VIN,
                 c.Name as customer_name,
-                e.Name as assigned_employee,
-                sl.Service_Type as service_type,
-                sl.Labor_Hours as labor_hours,
-                sl.Labor_Rate as labor_rate,
-                p.Name as part_name,
-                p.Price as part_price,
-                slup.Quantity as part_quantity
+                e.Name as assigned_employee
             FROM ServiceOrder so
             LEFT JOIN Customer c ON so.Customer_ID = c.ID
             LEFT JOIN Employee e ON so.Service_Advisor_ID = e.ID
-            LEFT JOIN ServiceLine sl ON so.ID = sl.Service_Order_ID
-            LEFT JOIN ServiceLineUsePart slup ON sl.ID = slup.Service_Line_ID
-            LEFT JOIN Part p ON slup.Part_ID = p.ID
             WHERE so.Customer_ID = %s
             ORDER BY so.Date_From DESC, so.ID DESC
         """
 
-        rows = execute_query(query, (customer_id,))
-        return jsonify({'service_orders': rows or []}), 200
+        orders = _nest_service_orders(stream_query(query, (customer_id,)))
+        return stream_rows('service_orders', orders)
 
-    except Exception as e:
-        print(f"Error in get_service_by_customer: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_service_by_customer")
         return jsonify({'error': 'Failed to fetch service for customer'}), 500
 
 
@@ -329,7 +466,6 @@ def report_part_shortage():
     if not user or user.get('user_type') not in ('employee', 'manager'):
         return jsonify({'error': 'Unauthorized'}), 401
 
-    from flask import request
     body = request.json or {}
     threshold = body.get('threshold', 5)
 
@@ -339,19 +475,21 @@ def report_part_shortage():
         return jsonify({'error': 'Invalid threshold'}), 400
 
     try:
+        # Range scan on idx_part_stock; usage is a primary key lookup per part
         query = """
-            SELECT ID, Name, Price, Stock
-            FROM Part
-            WHERE Stock <= %s
-            ORDER BY Stock ASC, ID ASC
+            SELECT p.ID, p.Name, p.Price, p.Stock, COALESCE(pu.Times_Used, 0) AS Times_Used
+            FROM Part p
+            LEFT JOIN PartUsage pu ON pu.Part_ID = p.ID
+            WHERE p.Stock <= %s
+            ORDER BY p.Stock ASC, p.ID ASC
         """
 
         rows = execute_query(query, (threshold,))
 
-        print(f"Part shortage report by user {user.get('username')} (threshold={threshold}): {len(rows or [])} items")
+        logger.info("Part shortage report by user %s (threshold=%s): %d items", user.get('username'), threshold, len(rows or []))
 
         return jsonify({'shortages': rows or [], 'threshold': threshold}), 200
 
-    except Exception as e:
-        print(f"Error in report_part_shortage: {str(e)}")
+    except Exception:
+        logger.exception("Error in report_part_shortage")
         return jsonify({'error': 'Failed to generate shortage report'}), 500
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""Run several GET views concurrently for one batch request (the dashboards).
+
+Each section runs on a shared thread pool in its own copy of the request
+context: it sees the same session and query string, checks out its own
+pooled connection through execute_query(), and its queries are counted in
+the batch request's metrics. The response time becomes the slowest section
+instead of the sum. FANOUT_THREADS (default 8) caps how many sections run
+at once across all batch requests, and so how many pooled connections they
+hold together.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import copy_current_request_context, current_app, g
+
+import metrics
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('FANOUT_THREADS', '8')),
+    thread_name_prefix='fanout',
+)
+
+
+def _run_section(name, view, request_id):
+    g.request_id = request_id
+    metrics.start_tally()
+    try:
+        response = current_app.make_response(view())
+        try:
+            # Streamed views are read to the end here, inside the section's context
+            return response.status_code, response.get_json(silent=True), metrics.tally()
+        finally:
+            response.close()
+    except Exception:
+        logger.exception("Error in dashboard section %s", name)
+        return 500, {'error': 'Request failed'}, metrics.tally()
+
+
+def fan_out(sections):
+    """Run {name: view} concurrently and merge the JSON bodies.
+
+    Returns {name: body} for sections that succeeded, plus
+    'errors': {name: {'status': ..., 'error': ...}} when any did not.
+    """
+    request_id = g.get('request_id')
+    futures = {
+        name: _executor.submit(copy_current_request_context(_run_section), name, view, request_id)
+        for name, view in sections.items()
+    }
+
+    result = {}
+    errors = {}
+    for name, future in futures.items():
+        status, body, counters = future.result()
+        metrics.add_tally(counters)
+        if status < 400:
+            result[name] = body
+        else:
+            errors[name] = {'status': status, 'error': (body or {}).get('error', 'Request failed')}
+    if errors:
+        result['errors'] = errors
+    return result
@@ -0,0 +1,38 @@
+"""Bulk-load CSV files into the database.
+
+Usage (from Backend/):
+
+    python import_csv.py path/to/csv_dir            # every <Table>.csv, in foreign-key order
+    python import_csv.py path/to/Part.csv --table Part
+    python import_csv.py path/to/csv_dir --batch-size 5000 --load-data
+"""
+import argparse
+import os
+
+from db_utils import bulk_load_csv, bulk_load_directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load CSV files into the AutoBase database")
+    parser.add_argument('path', help="a CSV file, or a directory of <Table>.csv files")
+    parser.add_argument('--table', help="target table when loading a single file (default: file name)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="rows per executemany batch")
+    parser.add_argument('--load-data', action='store_true', help="use LOAD DATA LOCAL INFILE")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.path):
+        results = bulk_load_directory(args.path, args.batch_size, args.load_data)
+    else:
+        table = args.table or os.path.splitext(os.path.basename(args.path))[0]
+        results = [bulk_load_csv(table, args.path, args.batch_size, args.load_data)]
+
+    for r in results:
+        print(f"Loaded {r['rows']} rows into {r['table']} in {r['seconds']:.2f}s ({r['rows_per_sec']} rows/sec)")
+    rows = sum(r['rows'] for r in results)
+    seconds = sum(r['seconds'] for r in results)
+    rate = f"{rows / seconds:.1f}" if seconds > 0 else "n/a"
+    print(f"Total: {rows} rows in {seconds:.2f}s ({rate} rows/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Sold/available state for vehicles (Vehicle.Is_Sold).
+
+buy_vehicle sets the flag in its purchase transaction. After loading
+SalesOrder rows outside the API (pipeline, import_csv.py), resync it from
+Backend/:
+
+    python inventory.py resync
+"""
+from db_utils import transaction
+
+# (table, column, definition, backfill run once when the column is added)
+SOLD_COLUMN = (
+    'Vehicle',
+    'Is_Sold',
+    "TINYINT(1) NOT NULL DEFAULT 0",
+    "UPDATE Vehicle v SET v.Is_Sold = EXISTS (SELECT 1 FROM SalesOrder so WHERE so.Vehicle_VIN = v.VIN)",
+)
+
+INDEXES = [
+    # Browsing order for /api/vehicle/vehicles plus Make/Model filters
+    ('Vehicle', 'idx_vehicle_available_browse', ('Is_Sold', 'Make', 'Model', 'Year', 'VIN')),
+    ('Vehicle', 'idx_vehicle_available_price', ('Is_Sold', 'Price')),
+]
+
+
+def mark_sold(tx, vin):
+    tx.execute("UPDATE Vehicle SET Is_Sold = 1 WHERE VIN = %s", (vin,))
+
+
+def resync():
+    """Recompute Is_Sold for every vehicle from SalesOrder"""
+    with transaction() as tx:
+        tx.execute(SOLD_COLUMN[3])
+        return tx.rowcount
+
+
+if __name__ == '__main__':
+    import sys
+
+    if sys.argv[1:] != ['resync']:
+        print("Usage: python inventory.py resync")
+        sys.exit(1)
+
+    print(f"Resynced sold flags: {resync()} vehicles changed")
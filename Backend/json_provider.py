@@ -0,0 +1,168 @@
+"""JSON provider for DB rows: Decimal, date/datetime and TIME values, tuple rows.
+
+Installed on the app in app.py, so jsonify(), current_app.json and the
+streaming helpers all use it. Encodes with orjson when installed
+(pip install orjson) and falls back to the standard library otherwise; both
+produce the same output:
+
+    Decimal          -> number (12345.67)
+    date             -> "2024-01-05"
+    datetime (naive) -> "2024-01-05T10:30:00+00:00"  (MySQL values are UTC)
+    timedelta (TIME) -> "10:30:00"
+
+TupleRows(columns, rows) holds rows as tuples with the column names stored
+once; it serializes as a list of objects. Rows are turned into dicts
+CHUNK_ROWS at a time and each chunk is encoded in one call, so the full list
+of dicts never exists at once, with either encoder.
+
+Encoding straight from the tuples (precomputed '"col":' key prefixes plus one
+orjson.dumps per value) was measured and is slower: per-call overhead on
+every value costs more than the short-lived dicts, which orjson encodes in C.
+benchmarks/bench_rows.py compares the two; for 100k sales rows it gives about
+220 ms for chunked dicts vs. 310-350 ms per value, with peak memory within
+20% of each other (the encoded output dominates; a chunk of dicts is ~0.3 MB).
+"""
+import datetime
+import decimal
+import json
+import os
+from collections.abc import Mapping
+
+from flask.json.provider import DefaultJSONProvider, _default as _flask_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Rows turned into dicts at a time when encoding TupleRows
+CHUNK_ROWS = 1000
+
+
+class TupleRows:
+    """Tuple rows sharing one list of column names; serializes like a list of dicts"""
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, columns, rows):
+        self.columns = tuple(columns)
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        columns = self.columns
+        for row in self.rows:
+            yield dict(zip(columns, row))
+
+
+def _default(o):
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    if isinstance(o, datetime.datetime):
+        if o.tzinfo is None:
+            o = o.replace(tzinfo=datetime.timezone.utc)
+        return o.isoformat()
+    if isinstance(o, datetime.date):
+        return o.isoformat()
+    if isinstance(o, datetime.timedelta):
+        seconds = int(o.total_seconds())
+        sign = '-' if seconds < 0 else ''
+        hours, rest = divmod(abs(seconds), 3600)
+        return f"{sign}{hours:02d}:{rest // 60:02d}:{rest % 60:02d}"
+    if isinstance(o, (bytes, bytearray)):
+        return o.decode('utf-8', 'replace')
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if isinstance(o, TupleRows):
+        columns = o.columns
+        return [dict(zip(columns, row)) for row in o.rows]
+    if isinstance(o, Mapping):
+        return dict(o)
+    return _flask_default(o)
+
+
+def _compat_default(o):
+    if isinstance(o, TupleRows):
+        return list(o)
+    if isinstance(o, Mapping):
+        return dict(o)
+    return _flask_default(o)
+
+
+class CompatJSONProvider(DefaultJSONProvider):
+    """Flask's own encoder (FAST_JSON=false), extended to the compact row results
+    (TupleRows / db_utils.Rows and their row views) that routes pass to jsonify"""
+
+    default = staticmethod(_compat_default)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with native handling of DB types and an orjson fast path.
+
+    Honours app.json.sort_keys (on by default, like Flask) so response
+    bodies keep the key order the frontend already sees.
+    """
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def _encode(self, obj):
+        if orjson is None:
+            return self._dumps_stdlib(obj).encode('utf-8')
+        return orjson.dumps(obj, default=_default, option=self._options())
+
+    def _encode_rows(self, rows):
+        columns = rows.columns
+        parts = []
+        for start in range(0, len(rows.rows), CHUNK_ROWS):
+            chunk = [dict(zip(columns, row)) for row in rows.rows[start:start + CHUNK_ROWS]]
+            parts.append(self._encode(chunk)[1:-1])
+        return b'[' + b','.join(parts) + b']'
+
+    def dumps_bytes(self, obj):
+        if isinstance(obj, TupleRows):
+            return self._encode_rows(obj)
+        # jsonify({'data': rows, ...}): splice chunk-encoded rows into the outer object
+        if isinstance(obj, dict) and any(isinstance(v, TupleRows) for v in obj.values()):
+            keys = sorted(obj, key=str) if self.sort_keys else obj
+            return b'{' + b','.join(
+                self._encode(str(key)) + b':' + self.dumps_bytes(obj[key]) for key in keys
+            ) + b'}'
+        return self._encode(obj)
+
+    def _dumps_stdlib(self, obj, **kwargs):
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return self._dumps_stdlib(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs or orjson is None:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = self._dumps_stdlib(obj, indent=2, separators=(',', ': ')).encode('utf-8')
+        else:
+            body = self.dumps_bytes(obj)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def init_app(app):
+    if os.getenv('FAST_JSON', 'true').lower() in ('1', 'true', 'yes'):
+        app.json = FastJSONProvider(app)
+    else:
+        app.json = CompatJSONProvider(app)
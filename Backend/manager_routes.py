@@ -1,7 +1,15 @@
 from flask import Blueprint, jsonify, request, session
-from db_utils import execute_query
+from db_utils import execute_query, stream_query
+from streaming import stream_rows
+from json_provider import TupleRows
+from slow_query_log import slow_query_log
+import datetime
+from app_logging import get_logger
+from fanout import fan_out
+import parts_forecast
 
 manager_bp = Blueprint('manager', __name__)
+logger = get_logger(__name__)
 
 
 def _require_manager():
@@ -11,101 +19,125 @@ def _require_manager():
     return True
 
 
+def _date_range(column):
+    """Build a WHERE fragment from ?date_from=&date_to= (YYYY-MM-DD). Raises ValueError."""
+    conditions = []
+    params = []
+    if request.args.get('date_from'):
+        conditions.append(f"{column} >= %s")
+        params.append(datetime.date.fromisoformat(request.args['date_from']))
+    if request.args.get('date_to'):
+        conditions.append(f"{column} <= %s")
+        params.append(datetime.date.fromisoformat(request.args['date_to']))
+    return conditions, params
+
+
 @manager_bp.route('/sales/aggregate', methods=['GET'])
 def sales_aggregate():
     """Aggregate sales data by date or by employee.
-    Query param: by=date|employee (default=date)
+    Query params: by=date|employee (default=date), date_from, date_to (YYYY-MM-DD)
+    Reads the rollups maintained by sales_rollup.py instead of scanning SalesOrder.
     """
     if not _require_manager():
         return jsonify({'error': 'Unauthorized'}), 401
 
     by = request.args.get('by', 'date')
 
+    try:
+        conditions, params = _date_range('r.Sales_Date')
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+    conditions.append("r.Order_Count > 0")
+    where = ' AND '.join(conditions)
+
     try:
         if by == 'employee':
-            query = """
+            query = f"""
                 SELECT 
                     e.ID as employee_id, 
                     e.Name as employee_name,
-                    SUM(so.Price) as total_sales, 
-                    COUNT(*) as order_count
-                FROM SalesOrder so
-                JOIN Employee e ON so.Sales_Employee_ID = e.ID
-                WHERE so.Sales_Employee_ID IS NOT NULL
+                    SUM(r.Total_Sales) as total_sales, 
+                    SUM(r.Order_Count) as order_count
+                FROM SalesEmployeeDailyRollup r
+                JOIN Employee e ON r.Employee_ID = e.ID
+                WHERE {where}
                 GROUP BY e.ID, e.Name
                 ORDER BY total_sales DESC
             """
-            res = execute_query(query)
+            res = execute_query(query, tuple(params))
             return jsonify({'by': 'employee', 'data': res or []}), 200
         else:
-            query = """
+            query = f"""
                 SELECT 
-                    Sales_Date as date,
-                    SUM(Price) as total_sales,
-                    COUNT(*) as order_count
-                FROM SalesOrder
-                GROUP BY Sales_Date
-                ORDER BY Sales_Date DESC
+                    r.Sales_Date as date,
+                    r.Total_Sales as total_sales,
+                    r.Order_Count as order_count
+                FROM SalesDailyRollup r
+                WHERE {where}
+                ORDER BY r.Sales_Date DESC
             """
-            res = execute_query(query)
+            res = execute_query(query, tuple(params))
             return jsonify({'by': 'date', 'data': res or []}), 200
 
-    except Exception as e:
-        print(f"Error in sales_aggregate: {str(e)}")
+    except Exception:
+        logger.exception("Error in sales_aggregate")
         return jsonify({'error': 'Failed to aggregate sales data'}), 500
 
 
 @manager_bp.route('/service/summary', methods=['GET'])
 def service_summary():
     """Return aggregated service revenue, labor hours, and parts cost/usage.
-    Query param: by=date|employee (default=date)
+    Query params: by=date|employee (default=date), date_from, date_to (YYYY-MM-DD)
+    Reads the per-order ledger maintained by service_ledger.py.
     """
     if not _require_manager():
         return jsonify({'error': 'Unauthorized'}), 401
 
     by = request.args.get('by', 'date')
 
+    try:
+        conditions, params = _date_range('c.Service_Date')
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+
     try:
         if by == 'employee':
             # Aggregate by service advisor (employee assigned to service order)
-            query = """
+            conditions.append("c.Service_Advisor_ID IS NOT NULL")
+            query = f"""
                 SELECT 
                     e.ID as employee_id, 
                     e.Name as employee_name,
-                    SUM(so.Price) as service_revenue,
-                    COALESCE(SUM(sl.Labor_Hours), 0) as labor_hours,
-                    COALESCE(SUM(p.Price * slup.Quantity), 0) as parts_cost
-                FROM ServiceOrder so
-                JOIN Employee e ON so.Service_Advisor_ID = e.ID
-                LEFT JOIN ServiceLine sl ON so.ID = sl.Service_Order_ID
-                LEFT JOIN ServiceLineUsePart slup ON sl.ID = slup.Service_Line_ID
-                LEFT JOIN Part p ON slup.Part_ID = p.ID
-                WHERE so.Service_Advisor_ID IS NOT NULL
+                    SUM(c.Revenue) as service_revenue,
+                    SUM(c.Labor_Hours) as labor_hours,
+                    SUM(c.Parts_Cost) as parts_cost
+                FROM ServiceOrderCost c
+                JOIN Employee e ON c.Service_Advisor_ID = e.ID
+                WHERE {' AND '.join(conditions)}
                 GROUP BY e.ID, e.Name
                 ORDER BY service_revenue DESC
             """
-            res = execute_query(query)
+            res = execute_query(query, tuple(params))
             return jsonify({'by': 'employee', 'data': res or []}), 200
         else:
             # Aggregate by service order date
-            query = """
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            query = f"""
                 SELECT 
-                    so.Date_From as date,
-                    SUM(so.Price) as service_revenue,
-                    COALESCE(SUM(sl.Labor_Hours), 0) as labor_hours,
-                    COALESCE(SUM(p.Price * slup.Quantity), 0) as parts_cost
-                FROM ServiceOrder so
-                LEFT JOIN ServiceLine sl ON so.ID = sl.Service_Order_ID
-                LEFT JOIN ServiceLineUsePart slup ON sl.ID = slup.Service_Line_ID
-                LEFT JOIN Part p ON slup.Part_ID = p.ID
-                GROUP BY so.Date_From
-                ORDER BY so.Date_From DESC
+                    c.Service_Date as date,
+                    SUM(c.Revenue) as service_revenue,
+                    SUM(c.Labor_Hours) as labor_hours,
+                    SUM(c.Parts_Cost) as parts_cost
+                FROM ServiceOrderCost c
+                {where}
+                GROUP BY c.Service_Date
+                ORDER BY c.Service_Date DESC
             """
-            res = execute_query(query)
+            res = execute_query(query, tuple(params))
             return jsonify({'by': 'date', 'data': res or []}), 200
 
-    except Exception as e:
-        print(f"Error in service_summary: {str(e)}")
+    except Exception:
+        logger.exception("Error in service_summary")
         return jsonify({'error': 'Failed to aggregate service data'}), 500
 
 
@@ -123,27 +155,28 @@ def parts_usage():
             except ValueError:
                 threshold = None
 
-        query = """
+        # Usage totals come from the trigger-maintained PartUsage counters (part_usage.py)
+        # and the stock filter uses idx_part_stock
+        where = "WHERE p.Stock <= %s" if threshold is not None else ""
+        query = f"""
             SELECT 
                 p.ID, 
                 p.Name, 
                 p.Price, 
                 p.Stock, 
-                COALESCE(SUM(slup.Quantity), 0) as times_used
+                COALESCE(pu.Times_Used, 0) as times_used
             FROM Part p
-            LEFT JOIN ServiceLineUsePart slup ON p.ID = slup.Part_ID
-            GROUP BY p.ID, p.Name, p.Price, p.Stock
+            LEFT JOIN PartUsage pu ON pu.Part_ID = p.ID
+            {where}
             ORDER BY times_used DESC
         """
-        res = execute_query(query)
-
-        if threshold is not None and res:
-            res = [r for r in res if r.get('Stock', 0) <= threshold]
+        params = (threshold,) if threshold is not None else None
+        res = execute_query(query, params, cache_ttl=60)
 
         return jsonify({'data': res or []}), 200
 
-    except Exception as e:
-        print(f"Error in parts_usage: {str(e)}")
+    except Exception:
+        logger.exception("Error in parts_usage")
         return jsonify({'error': 'Failed to fetch parts usage'}), 500
 
 
@@ -166,11 +199,10 @@ def customer_vehicles_report():
             GROUP BY C.ID, C.Name
             ORDER BY C.ID
         """
-        res = execute_query(query)
-        return jsonify({'data': res or []}), 200
+        return stream_rows('data', stream_query(query))
 
-    except Exception as e:
-        print(f"Error in customer_vehicles_report: {str(e)}")
+    except Exception:
+        logger.exception("Error in customer_vehicles_report")
         return jsonify({'error': 'Failed to generate customer vehicles report'}), 500
 
 
@@ -199,11 +231,10 @@ def waiting_vehicles_report():
             WHERE SO.Service_Status = 'WAITING'
             ORDER BY C.ID, SO.Vehicle_VIN
         """
-        res = execute_query(query)
-        return jsonify({'data': res or []}), 200
+        return stream_rows('data', stream_query(query))
 
-    except Exception as e:
-        print(f"Error in waiting_vehicles_report: {str(e)}")
+    except Exception:
+        logger.exception("Error in waiting_vehicles_report")
         return jsonify({'error': 'Failed to generate waiting vehicles report'}), 500
 
 
@@ -236,6 +267,93 @@ def employee_performance_report():
         res = execute_query(query)
         return jsonify({'data': res or []}), 200
 
-    except Exception as e:
-        print(f"Error in employee_performance_report: {str(e)}")
-        return jsonify({'error': 'Failed to generate employee performance report'}), 500
\ No newline at end of file
+    except Exception:
+        logger.exception("Error in employee_performance_report")
+        return jsonify({'error': 'Failed to generate employee performance report'}), 500
+
+
+@manager_bp.route('/parts/forecast', methods=['GET'])
+def parts_forecast_report():
+    """Demand forecast and reorder points for every part (parts_forecast.py).
+    Optional query params: history_days, window_days, lead_time_days, review_days,
+    service_level (e.g. 0.95), reorder_only=true
+    """
+    if not _require_manager():
+        return jsonify({'error': 'Unauthorized'}), 401
+    if parts_forecast.np is None:
+        return jsonify({'error': 'Parts forecasting requires numpy on the server'}), 503
+
+    try:
+        options = {
+            'history_days': int(request.args.get('history_days', 180)),
+            'window_days': int(request.args.get('window_days', 30)),
+            'lead_time_days': int(request.args.get('lead_time_days', 7)),
+            'review_days': int(request.args.get('review_days', 14)),
+            'service_level': float(request.args.get('service_level', 0.95)),
+        }
+    except ValueError:
+        return jsonify({'error': 'Invalid forecast parameter'}), 400
+    if (not 7 <= options['history_days'] <= 1095
+            or not 1 <= options['window_days'] <= options['history_days']
+            or not 0 <= options['lead_time_days'] <= 365
+            or not 0 <= options['review_days'] <= 365
+            or not 0.5 <= options['service_level'] < 1):
+        return jsonify({'error': 'Invalid forecast parameter'}), 400
+
+    try:
+        rows = parts_forecast.load_forecast(**options)
+        if request.args.get('reorder_only', '').lower() in ('1', 'true', 'yes'):
+            needs = rows.columns.index('Needs_Reorder')
+            rows = TupleRows(rows.columns, [row for row in rows.rows if row[needs]])
+        return jsonify({'data': rows, 'parameters': options}), 200
+
+    except Exception:
+        logger.exception("Error in parts_forecast_report")
+        return jsonify({'error': 'Failed to forecast parts demand'}), 500
+
+
+DASHBOARD_SECTIONS = {
+    'sales': sales_aggregate,
+    'service': service_summary,
+    'parts': parts_usage,
+    'customer_vehicles': customer_vehicles_report,
+    'waiting_vehicles': waiting_vehicles_report,
+    'employee_performance': employee_performance_report,
+}
+
+
+@manager_bp.route('/dashboard', methods=['GET'])
+def dashboard():
+    """Manager reports fetched concurrently in one request.
+
+    ?sections=sales,parts picks a subset (default: all). Other query
+    parameters (by, threshold, date_from, date_to) go to every report.
+    """
+    if not _require_manager():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    names = [name.strip() for name in request.args.get('sections', '').split(',') if name.strip()]
+    unknown = [name for name in names if name not in DASHBOARD_SECTIONS]
+    if unknown:
+        return jsonify({'error': f"Unknown section: {', '.join(unknown)}"}), 400
+
+    sections = {name: DASHBOARD_SECTIONS[name] for name in names or DASHBOARD_SECTIONS}
+    return jsonify(fan_out(sections)), 200
+
+
+@manager_bp.route('/slow-queries', methods=['GET', 'DELETE'])
+def slow_queries():
+    """Slow statements recorded by this worker (SLOW_QUERY_LOG_ENABLED). DELETE clears the log."""
+    if not _require_manager():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'DELETE':
+        slow_query_log.clear()
+        return jsonify({'message': 'Slow query log cleared'}), 200
+
+    return jsonify({
+        'enabled': slow_query_log.enabled,
+        'threshold_ms': slow_query_log.threshold * 1000,
+        'summary': slow_query_log.summary(),
+        'entries': slow_query_log.entries(),
+    }), 200
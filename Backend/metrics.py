@@ -0,0 +1,222 @@
+"""Per-endpoint request metrics, exposed in Prometheus text format at /api/metrics.
+
+Each request records total latency (histogram), time spent in the database
+vs. in Python, query and row counts, response bytes and time spent waiting
+for a pooled connection. Metrics are per process: under gunicorn every
+worker keeps its own counters, so scrape each worker or run a single one.
+Set METRICS_TOKEN to require "Authorization: Bearer <token>" on the endpoint.
+"""
+import os
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+
+from app_logging import get_logger, SAMPLED
+
+logger = get_logger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}  # (endpoint, method, status) -> count
+        self.latency = {}  # endpoint -> [bucket counts..., +Inf count, sum]
+        self.totals = {}  # (metric, endpoint) -> value
+
+    def observe(self, endpoint, method, status, duration, db_time, queries, rows, size, wait):
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            hist = self.latency.setdefault(endpoint, [0] * (len(LATENCY_BUCKETS) + 2))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    hist[i] += 1
+            hist[-2] += 1
+            hist[-1] += duration
+
+            for metric, value in (
+                ('db_seconds', db_time),
+                ('python_seconds', max(duration - db_time, 0.0)),
+                ('db_queries', queries),
+                ('db_rows', rows),
+                ('response_bytes', size),
+                ('connection_wait_seconds', wait),
+            ):
+                key = (metric, endpoint)
+                self.totals[key] = self.totals.get(key, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.requests), {k: list(v) for k, v in self.latency.items()}, dict(self.totals)
+
+
+registry = _Registry()
+
+
+# --- Hooks called from the DB layer (no-ops outside a request) ---
+
+def record_query(seconds, rows):
+    if has_request_context() and 'metrics_start' in g:
+        g.metrics_db_time += seconds
+        g.metrics_queries += 1
+        g.metrics_rows += rows
+
+
+def record_connection_wait(seconds):
+    if has_request_context() and 'metrics_start' in g:
+        g.metrics_wait += seconds
+
+
+def tally():
+    """This context's (db_time, queries, rows, wait) counters, or None"""
+    if has_request_context() and 'metrics_start' in g:
+        return g.metrics_db_time, g.metrics_queries, g.metrics_rows, g.metrics_wait
+    return None
+
+
+def add_tally(counters):
+    """Fold counters from work done on another thread (fanout.py) into this request.
+    DB time from parallel sections adds up, so it can exceed the request's latency."""
+    if counters and has_request_context() and 'metrics_start' in g:
+        db_time, queries, rows, wait = counters
+        g.metrics_db_time += db_time
+        g.metrics_queries += queries
+        g.metrics_rows += rows
+        g.metrics_wait += wait
+
+
+# --- Flask wiring ---
+
+def start_tally():
+    g.metrics_start = time.perf_counter()
+    g.metrics_db_time = 0.0
+    g.metrics_queries = 0
+    g.metrics_rows = 0
+    g.metrics_wait = 0.0
+
+
+def _counting(body, state):
+    for chunk in body:
+        state['bytes'] += len(chunk) if isinstance(chunk, bytes) else len(chunk.encode())
+        yield chunk
+
+
+def _after_request(response):
+    if 'metrics_start' not in g:
+        return response
+
+    endpoint = request.endpoint or 'unmatched'
+    method = request.method
+    status = str(response.status_code)
+    state = {'bytes': 0}
+    if response.is_streamed:
+        # Body is produced after this hook returns; count it as it goes out
+        response.response = _counting(response.response, state)
+    else:
+        state['bytes'] = response.content_length or 0
+
+    # Read g now: streamed bodies keep the request context alive until they finish
+    request_g = g._get_current_object()
+
+    def finish():
+        duration = time.perf_counter() - request_g.metrics_start
+        registry.observe(
+            endpoint, method, status, duration,
+            request_g.metrics_db_time,
+            request_g.metrics_queries,
+            request_g.metrics_rows,
+            state['bytes'],
+            request_g.metrics_wait,
+        )
+        # The request context may be gone by now, so pass the correlation ID explicitly
+        logger.info("%s %s %s", method, endpoint, status, extra={
+            **SAMPLED,
+            'request_id': request_g.get('request_id'),
+            'endpoint': endpoint,
+            'duration_ms': round(duration * 1000, 2),
+            'db_ms': round(request_g.metrics_db_time * 1000, 2),
+            'queries': request_g.metrics_queries,
+            'rows': request_g.metrics_rows,
+            'bytes': state['bytes'],
+        })
+
+    # Runs once the whole body has been sent, so streamed responses are timed fully
+    response.call_on_close(finish)
+    return response
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render():
+    # Imported here so metrics stays importable from the DB layer without cycles
+    from database import get_pool_stats
+    from query_cache import query_cache
+
+    requests, latency, totals = registry.snapshot()
+    lines = []
+
+    def header(name, kind, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    header('autobase_http_requests_total', 'counter', 'Requests by endpoint, method and status')
+    for (endpoint, method, status), count in sorted(requests.items()):
+        lines.append(f'autobase_http_requests_total{{endpoint="{_escape(endpoint)}",'
+                     f'method="{method}",status="{status}"}} {count}')
+
+    header('autobase_http_request_duration_seconds', 'histogram', 'Request latency')
+    for endpoint, hist in sorted(latency.items()):
+        label = f'endpoint="{_escape(endpoint)}"'
+        for bound, count in zip(LATENCY_BUCKETS, hist):
+            lines.append(f'autobase_http_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f'autobase_http_request_duration_seconds_bucket{{{label},le="+Inf"}} {hist[-2]}')
+        lines.append(f'autobase_http_request_duration_seconds_count{{{label}}} {hist[-2]}')
+        lines.append(f'autobase_http_request_duration_seconds_sum{{{label}}} {hist[-1]:.6f}')
+
+    for metric, help_text in (
+        ('db_seconds', 'Time spent executing and fetching SQL'),
+        ('python_seconds', 'Request time outside the database'),
+        ('db_queries', 'SQL statements executed'),
+        ('db_rows', 'Rows returned by SQL statements'),
+        ('response_bytes', 'Response body bytes sent'),
+        ('connection_wait_seconds', 'Time spent waiting for a pooled connection'),
+    ):
+        name = f'autobase_request_{metric}_total'
+        header(name, 'counter', help_text)
+        for (m, endpoint), value in sorted(totals.items()):
+            if m == metric:
+                lines.append(f'{name}{{endpoint="{_escape(endpoint)}"}} {value}')
+
+    pool = get_pool_stats()
+    header('autobase_db_pool_connections', 'gauge', 'Pooled connections by state')
+    lines.append(f'autobase_db_pool_connections{{state="idle"}} {pool["idle"]}')
+    lines.append(f'autobase_db_pool_connections{{state="checked_out"}} {pool["checked_out"]}')
+    for key in ('created', 'closed', 'recycled', 'ping_failures', 'checkouts', 'waits', 'timeouts'):
+        header(f'autobase_db_pool_{key}_total', 'counter', f'Connection pool {key.replace("_", " ")}')
+        lines.append(f'autobase_db_pool_{key}_total {pool[key]}')
+
+    cache = query_cache.stats()
+    for key in ('hits', 'misses', 'sets', 'invalidations', 'evictions', 'errors'):
+        header(f'autobase_query_cache_{key}_total', 'counter', f'Query cache {key}')
+        lines.append(f'autobase_query_cache_{key}_total {cache[key]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view():
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    app.before_request(start_tally)
+    app.after_request(_after_request)
+    app.add_url_rule('/api/metrics', 'metrics', metrics_view, methods=['GET'])
@@ -0,0 +1,111 @@
+"""Idempotent schema additions used by the backend (indexes, derived tables).
+
+Run from the Backend/ directory after deploying:
+
+    python migrations.py
+"""
+from database import get_db_connection, db_config
+from schema_cache import invalidate_schema_cache
+import inventory
+import part_usage
+import sales_rollup
+import service_ledger
+import service_reminders
+
+# (table, index name, columns)
+INDEXES = [
+    # Keyset pagination and filters for /api/employee/sales_orders
+    ('SalesOrder', 'idx_salesorder_employee_id', ('Sales_Employee_ID', 'ID')),
+    ('SalesOrder', 'idx_salesorder_customer_id', ('Customer_ID', 'ID')),
+    ('SalesOrder', 'idx_salesorder_date_id', ('Sales_Date', 'ID')),
+    *inventory.INDEXES,
+    *service_reminders.INDEXES,
+    *part_usage.INDEXES,
+]
+
+# (table, column, definition, backfill) columns added to existing tables
+COLUMNS = [
+    inventory.SOLD_COLUMN,
+]
+
+# CREATE TABLE IF NOT EXISTS statements for tables the backend maintains itself
+TABLES = [
+    sales_rollup.DAILY_TABLE_DDL,
+    sales_rollup.EMPLOYEE_TABLE_DDL,
+    service_ledger.TABLE_DDL,
+    part_usage.TABLE_DDL,
+]
+
+# (drop, create) pairs for stored procedures and triggers, recreated on every
+# run so definition changes take effect. Needs the TRIGGER privilege (and
+# log_bin_trust_function_creators when binary logging is on).
+ROUTINES = [
+    service_ledger.REFRESH_PROCEDURE,
+    *service_ledger.TRIGGERS,
+    *part_usage.TRIGGERS,
+]
+
+
+def index_exists(cursor, table, name):
+    cursor.execute(
+        """
+        SELECT 1
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = %s
+        LIMIT 1
+        """,
+        (db_config['database'], table, name)
+    )
+    return cursor.fetchone() is not None
+
+
+def column_exists(cursor, table, column):
+    cursor.execute(
+        """
+        SELECT 1
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        LIMIT 1
+        """,
+        (db_config['database'], table, column)
+    )
+    return cursor.fetchone() is not None
+
+
+def run_migrations():
+    applied = []
+    with get_db_connection() as conn:
+        cursor = conn.cursor(buffered=True)
+
+        for ddl in TABLES:
+            cursor.execute(ddl)
+
+        for table, column, definition, backfill in COLUMNS:
+            if column_exists(cursor, table, column):
+                continue
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            if backfill:
+                cursor.execute(backfill)
+            applied.append(f"{table}.{column}")
+
+        for drop, create in ROUTINES:
+            cursor.execute(drop)
+            cursor.execute(create)
+
+        for table, name, columns in INDEXES:
+            if index_exists(cursor, table, name):
+                continue
+            cursor.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+            applied.append(name)
+
+        conn.commit()
+        cursor.close()
+
+    invalidate_schema_cache()
+    return applied
+
+
+if __name__ == '__main__':
+    created = run_migrations()
+    print(f"Installed {len(ROUTINES)} procedures/triggers")
+    print(f"Added {len(created)} columns/indexes: {', '.join(created) or 'none'}")
@@ -0,0 +1,70 @@
+"""Running per-part usage totals (PartUsage), maintained by triggers.
+
+Part usage is written by the data pipeline rather than through the API, so
+like service_ledger.py the counters are kept current by MySQL triggers on
+ServiceLineUsePart that add or subtract each row's Quantity.
+migrations.py installs the table and triggers. To rebuild the counters
+from scratch (first deploy, or after loading usage with triggers disabled),
+run from Backend/:
+
+    python part_usage.py rebuild
+"""
+from db_utils import transaction
+
+TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS PartUsage (
+        Part_ID INT NOT NULL PRIMARY KEY,
+        Times_Used BIGINT NOT NULL DEFAULT 0
+    )
+"""
+
+INDEXES = [
+    # Low-stock filters for /api/manager/parts/usage and the shortage report
+    ('Part', 'idx_part_stock', ('Stock', 'ID')),
+]
+
+
+def _trigger(name, timing, body):
+    return (f"DROP TRIGGER IF EXISTS {name}",
+            f"CREATE TRIGGER {name} {timing} ON ServiceLineUsePart FOR EACH ROW {body}")
+
+
+def _add(row, sign):
+    return f"""
+        INSERT INTO PartUsage (Part_ID, Times_Used)
+        VALUES ({row}.Part_ID, {sign}COALESCE({row}.Quantity, 0))
+        ON DUPLICATE KEY UPDATE Times_Used = Times_Used {sign} COALESCE({row}.Quantity, 0)"""
+
+
+TRIGGERS = [
+    _trigger('trg_part_usage_ins', 'AFTER INSERT', _add('NEW', '+')),
+    _trigger('trg_part_usage_upd', 'AFTER UPDATE', f"""
+        BEGIN
+            {_add('OLD', '-')};
+            {_add('NEW', '+')};
+        END"""),
+    _trigger('trg_part_usage_del', 'AFTER DELETE', _add('OLD', '-')),
+]
+
+
+def rebuild():
+    """Recompute every counter from ServiceLineUsePart in one transaction"""
+    with transaction() as tx:
+        tx.execute("DELETE FROM PartUsage")
+        tx.execute("""
+            INSERT INTO PartUsage (Part_ID, Times_Used)
+            SELECT Part_ID, COALESCE(SUM(Quantity), 0)
+            FROM ServiceLineUsePart
+            GROUP BY Part_ID
+        """)
+        return tx.rowcount
+
+
+if __name__ == '__main__':
+    import sys
+
+    if sys.argv[1:] != ['rebuild']:
+        print("Usage: python part_usage.py rebuild")
+        sys.exit(1)
+
+    print(f"Rebuilt part usage counters: {rebuild()} parts")
@@ -0,0 +1,120 @@
+"""Parts demand forecast and reorder points, computed for all parts at once with NumPy.
+
+Daily consumption per part over the last `history_days` days (summed in SQL
+from ServiceLineUsePart by ServiceOrder.Date_From) is scattered into one
+parts x days matrix. Rates, moving averages, variability and reorder points
+are then whole-array operations, with no per-part Python loop:
+
+    rate          = mean daily use over the last `window_days`
+    safety stock  = z(service_level) * std(daily use) * sqrt(lead_time_days)
+    reorder point = rate * lead_time_days + safety stock
+    order up to   = reorder point + rate * review_days
+
+A part needs reordering when it is in use and Stock <= reorder point.
+Optional: pip install numpy. Served by GET /api/manager/parts/forecast.
+"""
+import itertools
+import math
+from statistics import NormalDist
+
+from db_utils import execute_query
+from json_provider import TupleRows
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The history aggregation is the expensive part; usage changes slowly
+HISTORY_CACHE_TTL = 300
+
+PARTS_QUERY = "SELECT ID, Name, Stock FROM Part ORDER BY ID"
+
+USAGE_QUERY = """
+    SELECT
+        slup.Part_ID,
+        DATEDIFF(CURDATE(), so.Date_From) AS Days_Ago,
+        CAST(SUM(slup.Quantity) AS SIGNED) AS Quantity
+    FROM ServiceLineUsePart slup
+    JOIN ServiceLine sl ON sl.ID = slup.Service_Line_ID
+    JOIN ServiceOrder so ON so.ID = sl.Service_Order_ID
+    WHERE so.Date_From > CURDATE() - INTERVAL %s DAY
+    GROUP BY slup.Part_ID, Days_Ago
+"""
+
+COLUMNS = ('Part_ID', 'Name', 'Stock', 'Used_In_History', 'Avg_Daily_History', 'Avg_Daily_7',
+           'Avg_Daily_Window', 'Daily_Std', 'Safety_Stock', 'Reorder_Point', 'Days_Of_Cover',
+           'Suggested_Order', 'Needs_Reorder')
+
+
+def demand_matrix(part_ids, usage, history_days):
+    """parts x days matrix of units used; column -1 is today.
+    usage rows are (Part_ID, Days_Ago, Quantity); unknown parts and days outside the window are dropped.
+    """
+    if not len(usage) or not len(part_ids):
+        return np.zeros((len(part_ids), history_days))
+
+    # fromiter over the flattened tuples is about twice as fast as np.asarray(list of tuples)
+    u = np.fromiter(itertools.chain.from_iterable(usage), dtype=np.int64, count=3 * len(usage)).reshape(-1, 3)
+    order = np.argsort(part_ids, kind='stable')
+    sorted_ids = part_ids[order]
+    pos = np.minimum(np.searchsorted(sorted_ids, u[:, 0]), len(sorted_ids) - 1)
+    keep = (sorted_ids[pos] == u[:, 0]) & (u[:, 1] >= 0) & (u[:, 1] < history_days)
+
+    flat = order[pos[keep]] * history_days + (history_days - 1 - u[keep, 1])
+    demand = np.bincount(flat, weights=u[keep, 2], minlength=len(part_ids) * history_days)
+    return demand.reshape(len(part_ids), history_days)
+
+
+def forecast(parts, usage, history_days=180, window_days=30, lead_time_days=7, review_days=14,
+             service_level=0.95):
+    """parts: rows of (ID, Name, Stock); usage: rows of (Part_ID, Days_Ago, Quantity).
+    Returns TupleRows (COLUMNS), parts needing reorder first, least days of cover first.
+    """
+    count = len(parts)
+    part_ids = np.fromiter((p[0] for p in parts), dtype=np.int64, count=count)
+    stock = np.fromiter((p[2] or 0 for p in parts), dtype=np.float64, count=count)
+    demand = demand_matrix(part_ids, usage, history_days)
+
+    window = demand[:, -min(window_days, history_days):]
+    used = demand.sum(axis=1)
+    rate = window.mean(axis=1)
+    sigma = window.std(axis=1)
+    z = NormalDist().inv_cdf(service_level)
+
+    safety = z * sigma * math.sqrt(lead_time_days)
+    reorder_point = rate * lead_time_days + safety
+    needs_reorder = (rate > 0) & (stock <= reorder_point)
+    suggested = np.where(needs_reorder, np.ceil(np.maximum(reorder_point + rate * review_days - stock, 0)), 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cover = np.where(rate > 0, stock / rate, np.inf)
+
+    rank = np.lexsort((cover, ~needs_reorder))
+    columns = [
+        part_ids[rank].tolist(),
+        [parts[i][1] for i in rank.tolist()],
+        [parts[i][2] for i in rank.tolist()],
+        used[rank].astype(np.int64).tolist(),
+        np.round(used / history_days, 3)[rank].tolist(),
+        np.round(demand[:, -min(7, history_days):].mean(axis=1), 3)[rank].tolist(),
+        np.round(rate, 3)[rank].tolist(),
+        np.round(sigma, 3)[rank].tolist(),
+        np.round(safety, 2)[rank].tolist(),
+        np.round(reorder_point, 2)[rank].tolist(),
+        # No consumption means no finite cover; JSON has no infinity
+        [None if math.isinf(c) else c for c in np.round(cover, 1)[rank].tolist()],
+        suggested[rank].astype(np.int64).tolist(),
+        needs_reorder[rank].tolist(),
+    ]
+    return TupleRows(COLUMNS, list(zip(*columns)))
+
+
+def load_forecast(history_days=180, **options):
+    """Run forecast() on the current parts and usage history. Raises if either query fails,
+    since an empty history would read as "nothing needs reordering"."""
+    if np is None:
+        raise RuntimeError("Parts forecasting requires the 'numpy' package")
+    parts = execute_query(PARTS_QUERY, compact=True, raise_errors=True)
+    usage = execute_query(USAGE_QUERY, (history_days,), cache_ttl=HISTORY_CACHE_TTL, compact=True,
+                          raise_errors=True)
+    return forecast(getattr(parts, 'rows', parts), getattr(usage, 'rows', usage), history_days, **options)
@@ -0,0 +1,118 @@
+"""Validated SELECTs over a single table for generic table reads.
+
+Table and column names are checked against the schema catalog and quoted,
+operators come from a fixed list, and every value is a bound parameter, so
+the generated SQL text only varies with the query's shape. That keeps it
+reusable by the per-connection prepared statement cache in db_utils.
+
+    sql, params = (TableQuery('Vehicle')
+                   .where('Make', '=', 'Toyota')
+                   .where('Year', '>=', 2020)
+                   .order_by('Price', descending=True)
+                   .limit(50)
+                   .build())
+"""
+from schema_cache import schema_catalog
+
+OPERATORS = ('=', '!=', '<', '<=', '>', '>=', 'LIKE', 'NOT LIKE', 'IN', 'NOT IN', 'IS NULL', 'IS NOT NULL')
+
+
+def _quote(name):
+    return f"`{name}`"
+
+
+class TableQuery:
+    def __init__(self, table, columns=None):
+        if not schema_catalog.has_table(table):
+            raise ValueError(f"Unknown table {table}")
+        self.table = table
+        # Column names are case-insensitive in MySQL; keep the catalog's spelling
+        self._columns = {name.lower(): name for name in schema_catalog.column_names(table)}
+        self.columns = [self.column(name) for name in columns] if columns else None
+        self._conditions = []
+        self._params = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    def column(self, name):
+        try:
+            return self._columns[str(name).strip().lower()]
+        except KeyError:
+            raise ValueError(f"{self.table} has no column {name}") from None
+
+    def where(self, column, op='=', value=None):
+        column = _quote(self.column(column))
+        op = op.strip().upper()
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator {op}")
+
+        if op in ('IS NULL', 'IS NOT NULL'):
+            self._conditions.append(f"{column} {op}")
+        elif op in ('IN', 'NOT IN'):
+            values = list(value or ())
+            if not values:
+                # Empty IN matches nothing; empty NOT IN matches everything
+                self._conditions.append("1 = 0" if op == 'IN' else "1 = 1")
+            else:
+                self._conditions.append(f"{column} {op} ({', '.join(['%s'] * len(values))})")
+                self._params.extend(values)
+        else:
+            self._conditions.append(f"{column} {op} %s")
+            self._params.append(value)
+        return self
+
+    def where_equal(self, filters):
+        """{column: value} filters; None means IS NULL and lists/tuples mean IN"""
+        for column, value in filters.items():
+            if value is None:
+                self.where(column, 'IS NULL')
+            elif isinstance(value, (list, tuple, set)):
+                self.where(column, 'IN', value)
+            else:
+                self.where(column, '=', value)
+        return self
+
+    def where_sql(self, fragment, params=()):
+        """Raw WHERE fragment for conditions the builder can't express.
+        The fragment must be constant SQL; values go in params."""
+        self._conditions.append(f"({fragment})")
+        self._params.extend(params or ())
+        return self
+
+    def order_by(self, column, descending=False):
+        self._order.append(f"{_quote(self.column(column))} {'DESC' if descending else 'ASC'}")
+        return self
+
+    def order_by_spec(self, spec):
+        """Parse "Price DESC, ID" (the old get_table_data order_by string)"""
+        for part in spec.split(','):
+            words = part.split()
+            if not words:
+                continue
+            if len(words) > 2 or (len(words) == 2 and words[1].upper() not in ('ASC', 'DESC')):
+                raise ValueError(f"Invalid ORDER BY term {part.strip()}")
+            self.order_by(words[0].strip('`'), descending=len(words) == 2 and words[1].upper() == 'DESC')
+        return self
+
+    def limit(self, count, offset=None):
+        self._limit = max(0, int(count))
+        self._offset = max(0, int(offset)) if offset else None
+        return self
+
+    def build(self):
+        """Return (sql, params)"""
+        columns = ', '.join(_quote(c) for c in self.columns) if self.columns else '*'
+        sql = f"SELECT {columns} FROM {_quote(self.table)}"
+        params = list(self._params)
+        if self._conditions:
+            sql += " WHERE " + " AND ".join(self._conditions)
+        if self._order:
+            sql += " ORDER BY " + ", ".join(self._order)
+        if self._limit is not None:
+            sql += " LIMIT %s"
+            params.append(self._limit)
+            if self._offset:
+                sql += " OFFSET %s"
+                params.append(self._offset)
+        return sql, tuple(params)
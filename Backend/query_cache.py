@@ -0,0 +1,269 @@
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from schema_cache import schema_catalog
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Tables a statement touches: FROM/JOIN for reads, plus INTO/UPDATE for writes
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE)\s+`?(?:\w+`?\.`?)?(\w+)`?", re.IGNORECASE)
+
+
+# Tables maintained by MySQL triggers (service_ledger.py, part_usage.py) change
+# without any statement naming them, so a write to a source table also counts
+# as a write to the tables derived from it
+DERIVED_TABLES = {
+    'serviceorder': {'serviceordercost'},
+    'serviceline': {'serviceordercost'},
+    'servicelineusepart': {'serviceordercost', 'partusage'},
+    'part': {'serviceordercost'},
+}
+
+
+def tables_in(query):
+    return {name.lower() for name in _TABLE_RE.findall(query)}
+
+
+def with_derived(tables):
+    """tables plus every table a trigger updates when they change"""
+    tables = set(tables)
+    for table in list(tables):
+        tables |= DERIVED_TABLES.get(table, set())
+    return tables
+
+
+def is_write(query):
+    return query.strip().upper().startswith(("INSERT", "UPDATE", "DELETE", "REPLACE"))
+
+
+def _copy(value):
+    # Dict rows are mutable; hand out copies so one request can't edit another's result.
+    # Rows / RowView results are read-only views over tuples and are shared as is.
+    if isinstance(value, list):
+        return [dict(row) if isinstance(row, dict) else row for row in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class MemoryBackend:
+    """Per-process LRU store with per-entry TTL and a tag -> keys index.
+
+    Invalidation only reaches this process: with several workers, the others
+    keep serving their copy until its TTL runs out.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._tags = {}  # tag -> set of keys
+        self.evictions = 0
+
+    def _drop(self, key):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            value = entry[2]
+        return _copy(value)
+
+    def set(self, key, value, tags, ttl):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, tags, value)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Store shared by every gunicorn worker, for any Redis-compatible server"""
+
+    def __init__(self, url, prefix='autobase:qc:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("QUERY_CACHE_BACKEND=redis requires the 'redis' package")
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.evictions = 0  # Redis evicts on its own (maxmemory-policy)
+        self._has_expire_gt = None
+
+    def _expire_gt(self):
+        # EXPIRE NX/GT arrived in Redis 7; checked on first use so import doesn't connect
+        if self._has_expire_gt is None:
+            version = self._client.info('server').get('redis_version', '0')
+            self._has_expire_gt = int(str(version).split('.')[0]) >= 7
+        return self._has_expire_gt
+
+    def get(self, key):
+        data = self._client.get(self.prefix + key)
+        return pickle.loads(data) if data is not None else None
+
+    def set(self, key, value, tags, ttl):
+        # A tag set must outlive every key in it, or later writes can't find those
+        # keys to evict them: its expiry is only ever moved later, never shortened
+        ttl = max(1, int(ttl))
+        tag_keys = [self.prefix + 'tag:' + tag for tag in tags]
+        expire_gt = self._expire_gt()
+        pipe = self._client.pipeline()
+        pipe.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=ttl)
+        for tag_key in tag_keys:
+            pipe.sadd(tag_key, key)
+            if expire_gt:
+                pipe.expire(tag_key, ttl, nx=True)
+                pipe.expire(tag_key, ttl, gt=True)
+            else:
+                pipe.ttl(tag_key)
+        results = pipe.execute()
+
+        if not expire_gt:
+            # Older servers: compare first (-1 = a new set with no expiry yet)
+            pipe = self._client.pipeline()
+            for tag_key, current in zip(tag_keys, results[2::2]):
+                if current < ttl:
+                    pipe.expire(tag_key, ttl)
+            pipe.execute()
+
+    def invalidate_tags(self, tags):
+        tag_keys = [self.prefix + 'tag:' + tag for tag in tags]
+        pipe = self._client.pipeline()
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        keys = set()
+        for members in pipe.execute():
+            keys |= {m.decode() for m in members}
+        if keys or tag_keys:
+            self._client.delete(*[self.prefix + k for k in keys], *tag_keys)
+        return len(keys)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + '*'):
+            self._client.delete(key)
+
+    def size(self):
+        # Not tracked; counting keys would mean a SCAN over the whole keyspace
+        return None
+
+
+class QueryCache:
+    """Read-through cache for SELECT results, invalidated by table tags.
+
+    Every get() returns a result of its own (a copy, or read-only Rows), so
+    callers may modify dict rows they get back.
+    """
+
+    def __init__(self, backend, default_ttl=60, enabled=True):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'invalidations': 0, 'errors': 0}
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def make_key(self, query, params, fetch_one, compact=False):
+        try:
+            version = schema_catalog.version
+        except Exception:
+            version = None
+        raw = repr((' '.join(query.split()), params, fetch_one, compact, version))
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            self._count('errors')
+            logger.warning("Query cache get failed: %s", e)
+            return None
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, key, value, tables, ttl=None):
+        try:
+            self.backend.set(key, value, tables, ttl or self.default_ttl)
+            self._count('sets')
+        except Exception as e:
+            self._count('errors')
+            logger.warning("Query cache set failed: %s", e)
+
+    def invalidate_tables(self, tables):
+        if not tables:
+            return
+        try:
+            self._count('invalidations', self.backend.invalidate_tags(tables))
+        except Exception as e:
+            self._count('errors')
+            logger.warning("Query cache invalidation failed: %s", e)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['evictions'] = self.backend.evictions
+        stats['entries'] = self.backend.size()
+        stats['backend'] = type(self.backend).__name__
+        stats['enabled'] = self.enabled
+        return stats
+
+
+def _make_backend():
+    if os.getenv('QUERY_CACHE_BACKEND', 'memory').lower() == 'redis':
+        return RedisBackend(os.getenv('QUERY_CACHE_URL', 'redis://localhost:6379/0'))
+    if int(os.getenv('WEB_CONCURRENCY', '1')) > 1:
+        logger.warning("QUERY_CACHE_BACKEND=memory with WEB_CONCURRENCY=%s workers: a write only "
+                       "evicts its own worker's cache, others serve stale reads for up to their TTL; "
+                       "use QUERY_CACHE_BACKEND=redis", os.getenv('WEB_CONCURRENCY'))
+    return MemoryBackend(max_entries=int(os.getenv('QUERY_CACHE_MAX_ENTRIES', '1024')))
+
+
+query_cache = QueryCache(
+    _make_backend(),
+    default_ttl=float(os.getenv('QUERY_CACHE_TTL', '60')),
+    enabled=os.getenv('QUERY_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+)
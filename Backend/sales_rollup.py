@@ -0,0 +1,103 @@
+"""Per-day and per-employee sales totals, maintained alongside SalesOrder.
+
+Writers call record_sale() / move_sale() inside the same transaction() as
+their SalesOrder change. To build the rollups from scratch (first deploy, or
+after editing SalesOrder by hand), run from Backend/:
+
+    python sales_rollup.py rebuild
+"""
+from db_utils import transaction
+
+DAILY_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS SalesDailyRollup (
+        Sales_Date DATE NOT NULL PRIMARY KEY,
+        Total_Sales DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        Order_Count INT NOT NULL DEFAULT 0
+    )
+"""
+
+EMPLOYEE_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS SalesEmployeeDailyRollup (
+        Sales_Date DATE NOT NULL,
+        Employee_ID INT NOT NULL,
+        Total_Sales DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        Order_Count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (Sales_Date, Employee_ID),
+        KEY idx_sales_employee_rollup_employee (Employee_ID, Sales_Date)
+    )
+"""
+
+
+def _add_to_employee(tx, sales_date, employee_id, price, count):
+    # count is +1 / -1; the arithmetic stays in SQL so price can be any numeric param
+    tx.execute(
+        """
+        INSERT INTO SalesEmployeeDailyRollup (Sales_Date, Employee_ID, Total_Sales, Order_Count)
+        VALUES (COALESCE(%s, CURDATE()), %s, %s * %s, %s)
+        ON DUPLICATE KEY UPDATE
+            Total_Sales = Total_Sales + %s * %s,
+            Order_Count = Order_Count + %s
+        """,
+        (sales_date, employee_id, price, count, count, price, count, count)
+    )
+
+
+def record_sale(tx, price, employee_id=None, sales_date=None):
+    """Add a new order to the rollups; sales_date defaults to CURDATE() like buy_vehicle"""
+    tx.execute(
+        """
+        INSERT INTO SalesDailyRollup (Sales_Date, Total_Sales, Order_Count)
+        VALUES (COALESCE(%s, CURDATE()), %s, 1)
+        ON DUPLICATE KEY UPDATE
+            Total_Sales = Total_Sales + %s,
+            Order_Count = Order_Count + 1
+        """,
+        (sales_date, price, price)
+    )
+    if employee_id is not None:
+        _add_to_employee(tx, sales_date, employee_id, price, 1)
+
+
+def move_sale(tx, order, new_employee_id):
+    """Move an existing order (Sales_Date, Price, Sales_Employee_ID) to another employee"""
+    old_employee_id = order['Sales_Employee_ID']
+    if old_employee_id is not None and str(old_employee_id) == str(new_employee_id):
+        return
+    if old_employee_id is not None:
+        _add_to_employee(tx, order['Sales_Date'], old_employee_id, order['Price'], -1)
+    if new_employee_id is not None:
+        _add_to_employee(tx, order['Sales_Date'], new_employee_id, order['Price'], 1)
+
+
+def rebuild():
+    """Recompute both rollups from SalesOrder in one transaction"""
+    with transaction() as tx:
+        tx.execute("DELETE FROM SalesDailyRollup")
+        tx.execute("DELETE FROM SalesEmployeeDailyRollup")
+        tx.execute("""
+            INSERT INTO SalesDailyRollup (Sales_Date, Total_Sales, Order_Count)
+            SELECT Sales_Date, SUM(Price), COUNT(*)
+            FROM SalesOrder
+            GROUP BY Sales_Date
+        """)
+        days = tx.rowcount
+        tx.execute("""
+            INSERT INTO SalesEmployeeDailyRollup (Sales_Date, Employee_ID, Total_Sales, Order_Count)
+            SELECT Sales_Date, Sales_Employee_ID, SUM(Price), COUNT(*)
+            FROM SalesOrder
+            WHERE Sales_Employee_ID IS NOT NULL
+            GROUP BY Sales_Date, Sales_Employee_ID
+        """)
+        employee_days = tx.rowcount
+    return days, employee_days
+
+
+if __name__ == '__main__':
+    import sys
+
+    if sys.argv[1:] != ['rebuild']:
+        print("Usage: python sales_rollup.py rebuild")
+        sys.exit(1)
+
+    days, employee_days = rebuild()
+    print(f"Rebuilt sales rollups: {days} days, {employee_days} employee-days")
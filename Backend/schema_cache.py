@@ -0,0 +1,157 @@
+import hashlib
+import os
+import threading
+import time
+
+from database import get_db_connection, db_config
+
+
+class SchemaCatalog:
+    """In-memory copy of the table, column and key metadata for one schema.
+
+    Everything is read with a single INFORMATION_SCHEMA query and kept until
+    invalidate() is called or `ttl` seconds pass (ttl <= 0 never expires).
+    `version` is a hash of the loaded metadata, identical across workers that
+    see the same schema, so other caches can include it in their keys.
+    """
+
+    LOAD_QUERY = """
+        SELECT
+            c.TABLE_NAME,
+            c.COLUMN_NAME,
+            c.DATA_TYPE,
+            c.IS_NULLABLE,
+            c.COLUMN_KEY,
+            k.CONSTRAINT_NAME,
+            k.ORDINAL_POSITION AS KEY_POSITION,
+            k.REFERENCED_TABLE_NAME,
+            k.REFERENCED_COLUMN_NAME
+        FROM INFORMATION_SCHEMA.COLUMNS c
+        LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+            ON k.TABLE_SCHEMA = c.TABLE_SCHEMA
+           AND k.TABLE_NAME = c.TABLE_NAME
+           AND k.COLUMN_NAME = c.COLUMN_NAME
+           AND (k.CONSTRAINT_NAME = 'PRIMARY' OR k.REFERENCED_TABLE_NAME IS NOT NULL)
+        WHERE c.TABLE_SCHEMA = %s
+        ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+    """
+
+    def __init__(self, schema, ttl=300):
+        self.schema = schema
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._tables = None
+        self._loaded_at = 0.0
+        self._version = None
+
+    def _expired(self):
+        if self._tables is None:
+            return True
+        return self.ttl > 0 and time.monotonic() - self._loaded_at > self.ttl
+
+    def load(self):
+        """(Re)load all metadata with one query"""
+        with get_db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(self.LOAD_QUERY, (self.schema,))
+            rows = cursor.fetchall()
+            cursor.close()
+
+        tables = {}
+        digest = hashlib.sha1()
+        for row in rows:
+            table = tables.setdefault(row['TABLE_NAME'], {
+                'columns': [],
+                'column_names': set(),
+                'primary_key': [],
+                'foreign_keys': [],
+            })
+
+            # A column shows up once per key it belongs to
+            if row['COLUMN_NAME'] not in table['column_names']:
+                table['column_names'].add(row['COLUMN_NAME'])
+                table['columns'].append({
+                    'COLUMN_NAME': row['COLUMN_NAME'],
+                    'DATA_TYPE': row['DATA_TYPE'],
+                    'IS_NULLABLE': row['IS_NULLABLE'],
+                    'COLUMN_KEY': row['COLUMN_KEY'],
+                })
+
+            if row['CONSTRAINT_NAME'] == 'PRIMARY':
+                table['primary_key'].append((row['KEY_POSITION'], row['COLUMN_NAME']))
+            elif row['REFERENCED_TABLE_NAME'] is not None:
+                table['foreign_keys'].append({
+                    'COLUMN_NAME': row['COLUMN_NAME'],
+                    'REFERENCED_TABLE_NAME': row['REFERENCED_TABLE_NAME'],
+                    'REFERENCED_COLUMN_NAME': row['REFERENCED_COLUMN_NAME'],
+                })
+
+            digest.update(repr(sorted(row.items())).encode())
+
+        for table in tables.values():
+            table['primary_key'] = [name for _, name in sorted(table['primary_key'])]
+
+        with self._lock:
+            self._tables = tables
+            self._loaded_at = time.monotonic()
+            self._version = digest.hexdigest()[:16]
+
+        return tables
+
+    def invalidate(self):
+        """Drop the cached metadata; the next lookup reloads it (call after migrations)"""
+        with self._lock:
+            self._tables = None
+            self._version = None
+
+    def _get_tables(self):
+        with self._lock:
+            if not self._expired():
+                return self._tables
+        # Only one thread reloads; the others wait and reuse its result
+        with self._load_lock:
+            with self._lock:
+                if not self._expired():
+                    return self._tables
+            return self.load()
+
+    def _get_table(self, table_name):
+        return self._get_tables().get(table_name)
+
+    @property
+    def version(self):
+        self._get_tables()
+        return self._version
+
+    def table_names(self):
+        return list(self._get_tables())
+
+    def has_table(self, table_name):
+        return self._get_table(table_name) is not None
+
+    def columns(self, table_name):
+        table = self._get_table(table_name)
+        return [dict(col) for col in table['columns']] if table else []
+
+    def column_names(self, table_name):
+        table = self._get_table(table_name)
+        return [col['COLUMN_NAME'] for col in table['columns']] if table else []
+
+    def primary_key(self, table_name):
+        table = self._get_table(table_name)
+        return list(table['primary_key']) if table else []
+
+    def foreign_keys(self, table_name):
+        table = self._get_table(table_name)
+        return [dict(fk) for fk in table['foreign_keys']] if table else []
+
+
+schema_catalog = SchemaCatalog(
+    db_config['database'],
+    ttl=float(os.getenv('SCHEMA_CACHE_TTL', '300')),
+)
+
+
+def invalidate_schema_cache():
+    schema_catalog.invalidate()
@@ -0,0 +1,147 @@
+"""Per service order revenue, labor and parts totals (ServiceOrderCost).
+
+Service orders, lines and part usage are written by the data pipeline rather
+than through the API, so the ledger is kept current by MySQL triggers that
+recompute the affected order on every ServiceOrder / ServiceLine /
+ServiceLineUsePart write and adjust Parts_Cost when a Part's price changes.
+migrations.py installs the table, procedure and triggers. To rebuild the
+ledger from scratch, run from Backend/:
+
+    python service_ledger.py rebuild
+"""
+from db_utils import transaction
+
+TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS ServiceOrderCost (
+        Service_Order_ID INT NOT NULL PRIMARY KEY,
+        Service_Date DATE NULL,
+        Service_Advisor_ID INT NULL,
+        Revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        Labor_Hours DECIMAL(12, 2) NOT NULL DEFAULT 0,
+        Labor_Cost DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        Parts_Cost DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        KEY idx_service_cost_date (Service_Date),
+        KEY idx_service_cost_advisor_date (Service_Advisor_ID, Service_Date)
+    )
+"""
+
+# Totals per order, each child table aggregated on its own so lines and parts
+# don't multiply each other's rows
+_COST_SELECT = """
+    SELECT
+        so.ID,
+        so.Date_From,
+        so.Service_Advisor_ID,
+        COALESCE(so.Price, 0),
+        COALESCE(lab.hours, 0),
+        COALESCE(lab.cost, 0),
+        COALESCE(parts.cost, 0)
+    FROM ServiceOrder so
+    LEFT JOIN (
+        SELECT Service_Order_ID, SUM(Labor_Hours) AS hours, SUM(Labor_Hours * Labor_Rate) AS cost
+        FROM ServiceLine
+        {line_filter}
+        GROUP BY Service_Order_ID
+    ) lab ON lab.Service_Order_ID = so.ID
+    LEFT JOIN (
+        SELECT sl.Service_Order_ID, SUM(p.Price * slup.Quantity) AS cost
+        FROM ServiceLine sl
+        JOIN ServiceLineUsePart slup ON slup.Service_Line_ID = sl.ID
+        JOIN Part p ON p.ID = slup.Part_ID
+        {part_filter}
+        GROUP BY sl.Service_Order_ID
+    ) parts ON parts.Service_Order_ID = so.ID
+"""
+
+_COST_COLUMNS = """
+    ServiceOrderCost (Service_Order_ID, Service_Date, Service_Advisor_ID,
+                      Revenue, Labor_Hours, Labor_Cost, Parts_Cost)
+"""
+
+REFRESH_PROCEDURE = ("DROP PROCEDURE IF EXISTS RefreshServiceOrderCost", f"""
+    CREATE PROCEDURE RefreshServiceOrderCost(IN order_id INT)
+    BEGIN
+        DELETE FROM ServiceOrderCost WHERE Service_Order_ID = order_id;
+        INSERT INTO {_COST_COLUMNS}
+        {_COST_SELECT.format(
+            line_filter="WHERE Service_Order_ID = order_id",
+            part_filter="WHERE sl.Service_Order_ID = order_id",
+        )}
+        WHERE so.ID = order_id;
+    END
+""")
+
+
+def _trigger(name, timing, table, body):
+    return (f"DROP TRIGGER IF EXISTS {name}",
+            f"CREATE TRIGGER {name} {timing} ON {table} FOR EACH ROW {body}")
+
+
+_LINE_ORDER = "(SELECT Service_Order_ID FROM ServiceLine WHERE ID = {row}.Service_Line_ID)"
+
+TRIGGERS = [
+    _trigger('trg_service_cost_order_ins', 'AFTER INSERT', 'ServiceOrder',
+             "CALL RefreshServiceOrderCost(NEW.ID)"),
+    _trigger('trg_service_cost_order_upd', 'AFTER UPDATE', 'ServiceOrder',
+             "CALL RefreshServiceOrderCost(NEW.ID)"),
+    _trigger('trg_service_cost_order_del', 'AFTER DELETE', 'ServiceOrder',
+             "DELETE FROM ServiceOrderCost WHERE Service_Order_ID = OLD.ID"),
+
+    _trigger('trg_service_cost_line_ins', 'AFTER INSERT', 'ServiceLine',
+             "CALL RefreshServiceOrderCost(NEW.Service_Order_ID)"),
+    _trigger('trg_service_cost_line_upd', 'AFTER UPDATE', 'ServiceLine', """
+        BEGIN
+            CALL RefreshServiceOrderCost(NEW.Service_Order_ID);
+            IF NOT (OLD.Service_Order_ID <=> NEW.Service_Order_ID) THEN
+                CALL RefreshServiceOrderCost(OLD.Service_Order_ID);
+            END IF;
+        END"""),
+    _trigger('trg_service_cost_line_del', 'AFTER DELETE', 'ServiceLine',
+             "CALL RefreshServiceOrderCost(OLD.Service_Order_ID)"),
+
+    _trigger('trg_service_cost_part_use_ins', 'AFTER INSERT', 'ServiceLineUsePart',
+             f"CALL RefreshServiceOrderCost({_LINE_ORDER.format(row='NEW')})"),
+    _trigger('trg_service_cost_part_use_upd', 'AFTER UPDATE', 'ServiceLineUsePart', f"""
+        BEGIN
+            CALL RefreshServiceOrderCost({_LINE_ORDER.format(row='NEW')});
+            IF NOT (OLD.Service_Line_ID <=> NEW.Service_Line_ID) THEN
+                CALL RefreshServiceOrderCost({_LINE_ORDER.format(row='OLD')});
+            END IF;
+        END"""),
+    _trigger('trg_service_cost_part_use_del', 'AFTER DELETE', 'ServiceLineUsePart',
+             f"CALL RefreshServiceOrderCost({_LINE_ORDER.format(row='OLD')})"),
+
+    # A price change shifts Parts_Cost by quantity used * price delta
+    _trigger('trg_service_cost_part_price', 'AFTER UPDATE', 'Part', """
+        BEGIN
+            IF NOT (OLD.Price <=> NEW.Price) THEN
+                UPDATE ServiceOrderCost c
+                JOIN (
+                    SELECT sl.Service_Order_ID, SUM(slup.Quantity) AS qty
+                    FROM ServiceLineUsePart slup
+                    JOIN ServiceLine sl ON sl.ID = slup.Service_Line_ID
+                    WHERE slup.Part_ID = NEW.ID
+                    GROUP BY sl.Service_Order_ID
+                ) used ON used.Service_Order_ID = c.Service_Order_ID
+                SET c.Parts_Cost = c.Parts_Cost + used.qty * (COALESCE(NEW.Price, 0) - COALESCE(OLD.Price, 0));
+            END IF;
+        END"""),
+]
+
+
+def rebuild():
+    """Recompute the whole ledger from the service tables in one transaction"""
+    with transaction() as tx:
+        tx.execute("DELETE FROM ServiceOrderCost")
+        tx.execute(f"INSERT INTO {_COST_COLUMNS} " + _COST_SELECT.format(line_filter="", part_filter=""))
+        return tx.rowcount
+
+
+if __name__ == '__main__':
+    import sys
+
+    if sys.argv[1:] != ['rebuild']:
+        print("Usage: python service_ledger.py rebuild")
+        sys.exit(1)
+
+    print(f"Rebuilt service cost ledger: {rebuild()} service orders")
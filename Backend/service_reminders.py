@@ -0,0 +1,106 @@
+"""Vehicles due for service, evaluated in SQL.
+
+A vehicle is due when its owner has never had it serviced, or the latest
+ServiceOrder.Date_From for it is more than SERVICE_INTERVAL_DAYS (default
+365) days ago. /api/customer/vehicles_due_service checks one customer;
+the nightly reminder job checks every customer in one pass, from Backend/:
+
+    python service_reminders.py due [--interval-days 365] [--format csv|ndjson]
+
+which writes one row per due vehicle (with the owner's contact details) to
+stdout.
+"""
+import os
+
+from db_utils import execute_query, stream_query
+
+SERVICE_INTERVAL_DAYS = int(os.getenv('SERVICE_INTERVAL_DAYS', '365'))
+
+INDEXES = [
+    # Latest service date per vehicle for the due-service checks
+    ('ServiceOrder', 'idx_serviceorder_vin_date', ('Vehicle_VIN', 'Date_From')),
+]
+
+# Only service orders placed by the vehicle's current owner count
+CUSTOMER_DUE_QUERY = """
+    SELECT
+        v.VIN,
+        v.Make,
+        v.Model,
+        v.Year,
+        MAX(so.Date_From) AS Last_Service_Date
+    FROM CustomerOwnVehicle cov
+    JOIN Vehicle v ON v.VIN = cov.Vehicle_VIN
+    LEFT JOIN ServiceOrder so ON so.Vehicle_VIN = cov.Vehicle_VIN AND so.Customer_ID = cov.Customer_ID
+    WHERE cov.Customer_ID = %s
+    GROUP BY v.VIN, v.Make, v.Model, v.Year
+    HAVING Last_Service_Date IS NULL OR Last_Service_Date < CURDATE() - INTERVAL %s DAY
+    ORDER BY v.VIN
+"""
+
+FLEET_DUE_QUERY = """
+    SELECT
+        c.ID AS Customer_ID,
+        c.Name AS Customer_Name,
+        c.Email,
+        c.Phone,
+        v.VIN,
+        v.Make,
+        v.Model,
+        v.Year,
+        MAX(so.Date_From) AS Last_Service_Date
+    FROM CustomerOwnVehicle cov
+    JOIN Customer c ON c.ID = cov.Customer_ID
+    JOIN Vehicle v ON v.VIN = cov.Vehicle_VIN
+    LEFT JOIN ServiceOrder so ON so.Vehicle_VIN = cov.Vehicle_VIN AND so.Customer_ID = cov.Customer_ID
+    GROUP BY c.ID, c.Name, c.Email, c.Phone, v.VIN, v.Make, v.Model, v.Year
+    HAVING Last_Service_Date IS NULL OR Last_Service_Date < CURDATE() - INTERVAL %s DAY
+    ORDER BY c.ID, v.VIN
+"""
+
+
+def due_for_customer(customer_id, interval_days=None):
+    """Due vehicles owned by one customer"""
+    if interval_days is None:
+        interval_days = SERVICE_INTERVAL_DAYS
+    return execute_query(CUSTOMER_DUE_QUERY, (customer_id, interval_days))
+
+
+def due_for_fleet(interval_days=None):
+    """Yield due vehicles for every customer, streamed from a single query"""
+    if interval_days is None:
+        interval_days = SERVICE_INTERVAL_DAYS
+    return stream_query(FLEET_DUE_QUERY, (interval_days,))
+
+
+if __name__ == '__main__':
+    import argparse
+    import csv
+    import sys
+
+    from flask import Flask
+
+    import json_provider
+
+    parser = argparse.ArgumentParser(description="List vehicles due for service for every customer")
+    parser.add_argument('command', choices=['due'])
+    parser.add_argument('--interval-days', type=int, default=SERVICE_INTERVAL_DAYS)
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+    args = parser.parse_args()
+
+    count = 0
+    if args.format == 'csv':
+        writer = None
+        for row in due_for_fleet(args.interval_days):
+            if writer is None:
+                writer = csv.DictWriter(sys.stdout, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            count += 1
+    else:
+        # Same date/Decimal encoding as the API
+        encoder = json_provider.FastJSONProvider(Flask(__name__))
+        for row in due_for_fleet(args.interval_days):
+            sys.stdout.write(encoder.dumps(row) + '\n')
+            count += 1
+    print(f"{count} vehicles due for service", file=sys.stderr)
@@ -0,0 +1,140 @@
+"""Opt-in recorder for SQL statements slower than a threshold.
+
+execute_query, execute_prepared and stream_query hand every statement to
+record(); ones over SLOW_QUERY_MS are kept (normalized SQL, parameter types,
+duration, rows and the calling endpoint) in a ring buffer of
+SLOW_QUERY_LOG_SIZE entries. SELECTs
+also get their EXPLAIN plan, captured at most once per statement shape every
+SLOW_QUERY_EXPLAIN_INTERVAL seconds. Parameter values are never stored.
+Managers read it from GET /api/manager/slow-queries.
+"""
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from flask import g, has_request_context, request
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+_STRING_RE = re.compile(r"(\bAS\s+)?('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)")
+
+
+def normalize(query):
+    """Collapse whitespace and replace literals so equal shapes group together"""
+    # Column aliases ("AS 'Employee ID'") are kept for readability
+    sql = _STRING_RE.sub(lambda m: m.group(0) if m.group(1) else '?', query)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+def _params_shape(params):
+    if not params:
+        return []
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms=200, size=100, explain=True, explain_interval=300, enabled=False):
+        self.threshold = threshold_ms / 1000.0
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.enabled = enabled
+        self._entries = deque(maxlen=size)
+        self._plans = {}  # normalized sql -> (captured_at, plan)
+        self._lock = threading.Lock()
+
+    def is_slow(self, seconds):
+        return self.enabled and seconds >= self.threshold
+
+    def record(self, conn, query, params, seconds, rows):
+        """Store a statement if it was slow; conn is used for EXPLAIN and must be idle"""
+        if not self.is_slow(seconds):
+            return
+
+        sql = normalize(query)
+        entry = {
+            'sql': sql,
+            'params': _params_shape(params),
+            'duration_ms': round(seconds * 1000, 2),
+            'rows': rows,
+            'endpoint': request.endpoint if has_request_context() else None,
+            'request_id': g.get('request_id') if has_request_context() else None,
+            'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'explain': self._explain(conn, query, params, sql),
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+    def _explain(self, conn, query, params, sql):
+        if not (self.explain and conn is not None and query.lstrip().upper().startswith('SELECT')):
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(sql)
+        if cached and now - cached[0] < self.explain_interval:
+            return cached[1]
+
+        try:
+            cursor = conn.cursor(dictionary=True, buffered=True)
+            if params:
+                cursor.execute("EXPLAIN " + query, params)
+            else:
+                cursor.execute("EXPLAIN " + query)
+            plan = cursor.fetchall()
+            cursor.close()
+        except Exception as e:
+            logger.warning("Error capturing EXPLAIN: %s", e)
+            return None
+
+        with self._lock:
+            # Bounded alongside the ring buffer so odd one-off shapes don't pile up
+            if len(self._plans) >= self._entries.maxlen:
+                self._plans.clear()
+            self._plans[sql] = (now, plan)
+        return plan
+
+    def entries(self):
+        with self._lock:
+            return list(self._entries)
+
+    def summary(self):
+        """Per statement shape: count, total and max duration, slowest first by total"""
+        groups = {}
+        for entry in self.entries():
+            group = groups.setdefault(entry['sql'], {
+                'sql': entry['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'endpoints': set(),
+            })
+            group['count'] += 1
+            group['total_ms'] += entry['duration_ms']
+            group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+            if entry['endpoint']:
+                group['endpoints'].add(entry['endpoint'])
+
+        result = sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
+        for group in result:
+            group['total_ms'] = round(group['total_ms'], 2)
+            group['endpoints'] = sorted(group['endpoints'])
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=float(os.getenv('SLOW_QUERY_MS', '200')),
+    size=int(os.getenv('SLOW_QUERY_LOG_SIZE', '100')),
+    explain=os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() in ('1', 'true', 'yes'),
+    explain_interval=float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', '300')),
+    enabled=os.getenv('SLOW_QUERY_LOG_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+)
@@ -0,0 +1,61 @@
+from flask import Response, current_app, request, stream_with_context
+
+# Rows serialized per chunk written to the socket
+CHUNK_ROWS = 200
+
+_END = object()
+
+
+def wants_ndjson():
+    return (request.args.get('format') == 'ndjson'
+            or 'application/x-ndjson' in request.headers.get('Accept', ''))
+
+
+def _chunks(first, rows, dumps, sep):
+    buf = [dumps(first)]
+    for row in rows:
+        # Flush a full buffer only once another row follows, so no trailing separator
+        if len(buf) >= CHUNK_ROWS:
+            yield sep.join(buf) + sep
+            buf = []
+        buf.append(dumps(row))
+    yield sep.join(buf)
+
+
+def stream_json(key, rows):
+    """Stream {"<key>": [row, ...]} while rows are still being fetched"""
+    rows = iter(rows)
+    # Pull the first row now so query errors surface before the 200 is sent
+    first = next(rows, _END)
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield '{' + dumps(key) + ':['
+        if first is not _END:
+            for chunk in _chunks(first, rows, dumps, ','):
+                yield chunk
+        yield ']}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def stream_ndjson(rows):
+    """Stream one JSON document per line"""
+    rows = iter(rows)
+    first = next(rows, _END)
+    dumps = current_app.json.dumps
+
+    def generate():
+        if first is not _END:
+            for chunk in _chunks(first, rows, dumps, '\n'):
+                yield chunk
+            yield '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def stream_rows(key, rows):
+    """JSON array under `key` by default, NDJSON when the client asks for it"""
+    if wants_ndjson():
+        return stream_ndjson(rows)
+    return stream_json(key, rows)
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+import pytest
+from flask import Flask, Response, stream_with_context
+
+import asgi
+
+CHUNKS = 1000
+
+
+@pytest.fixture
+def stream_app(monkeypatch):
+    """A Flask app whose /stream response records how far it got and whether it was closed"""
+    app = Flask(__name__)
+    state = {'sent': 0, 'closed': threading.Event()}
+
+    @app.route('/stream')
+    def stream():
+        def generate():
+            try:
+                for i in range(CHUNKS):
+                    state['sent'] = i + 1
+                    yield f"{i}\n"
+            finally:
+                # Where stream_query would hand its connection back to the pool
+                state['closed'].set()
+        return Response(stream_with_context(generate()), mimetype='text/plain')
+
+    monkeypatch.setattr(asgi, 'flask_app', app)
+    monkeypatch.setattr(asgi, 'WSGI_PUT_POLL_SECONDS', 0.05)
+    return state
+
+
+def scope(path):
+    return {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': [],
+            'http_version': '1.1', 'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 1)}
+
+
+def test_full_response(stream_app):
+    messages = []
+
+    requested = []
+
+    async def receive():
+        if requested:
+            await asyncio.Event().wait()  # the client stays connected
+        requested.append(True)
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi._run_wsgi(scope('/stream'), receive, send))
+
+    assert messages[0]['status'] == 200
+    assert b''.join(m.get('body', b'') for m in messages[1:]) == ''.join(f"{i}\n" for i in range(CHUNKS)).encode()
+    assert not messages[-1].get('more_body')
+    assert stream_app['closed'].is_set()
+
+
+def test_send_failing_mid_stream_closes_the_response(stream_app):
+    sent = []
+    requested = []
+
+    async def receive():
+        if requested:
+            await asyncio.Event().wait()  # the server reports nothing; send() fails instead
+        requested.append(True)
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+        if len(sent) > 3:
+            raise OSError("Connection reset by peer")
+
+    with pytest.raises(OSError):
+        asyncio.run(asyncio.wait_for(asgi._run_wsgi(scope('/stream'), receive, send), 5))
+
+    assert stream_app['closed'].wait(2)
+    assert stream_app['sent'] < CHUNKS
+
+
+def test_disconnect_mid_stream_closes_the_response(stream_app):
+    sent = []
+    requested = []
+
+    async def receive():
+        if not requested:
+            requested.append(True)
+            return {'type': 'http.request', 'body': b''}
+        # The client goes away once a few chunks have arrived
+        while len(sent) < 3:
+            await asyncio.sleep(0.01)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+        # A slow client: the worker fills the queue and blocks in put()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(asyncio.wait_for(asgi._run_wsgi(scope('/stream'), receive, send), 5))
+
+    assert stream_app['closed'].wait(2)
+    assert stream_app['sent'] < CHUNKS
@@ -0,0 +1,67 @@
+"""Listings that return compact Rows must still encode with FAST_JSON=false"""
+import decimal
+
+import pytest
+
+import employee_routes
+import json_provider
+import parts_forecast
+import vehicle_routes
+from app import app
+from db_utils import Rows
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('FAST_JSON', 'false')
+    monkeypatch.setattr(app, 'json', app.json)  # restored after the test
+    json_provider.init_app(app)
+    assert isinstance(app.json, json_provider.CompatJSONProvider)
+    return app.test_client()
+
+
+def login(client, user_type):
+    with client.session_transaction() as session:
+        session['user'] = {'id': 1, 'user_type': user_type}
+
+
+def test_vehicle_listing(client, monkeypatch):
+    rows = Rows(('VIN', 'Make', 'Model', 'Color', 'Year', 'Mileage', 'Price'),
+                [('VIN1', 'Honda', 'Civic', 'Blue', 2020, 1000, decimal.Decimal('15000.00'))])
+    monkeypatch.setattr(vehicle_routes, 'execute_query', lambda *args, **kwargs: rows)
+
+    response = client.get('/api/vehicle/vehicles')
+
+    assert response.status_code == 200
+    assert response.get_json()['vehicle'] == [{'VIN': 'VIN1', 'Make': 'Honda', 'Model': 'Civic', 'Color': 'Blue',
+                                               'Year': 2020, 'Mileage': 1000, 'Price': '15000.00'}]
+
+
+def test_sales_order_listing(client, monkeypatch):
+    rows = Rows(('ID', 'Price'), [(3, 10), (2, 20)])
+    monkeypatch.setattr(employee_routes, 'execute_query', lambda *args, **kwargs: rows)
+    login(client, 'employee')
+
+    response = client.get('/api/employee/sales_orders?limit=1')
+
+    assert response.status_code == 200
+    assert response.get_json() == {'sales_orders': [{'ID': 3, 'Price': 10}], 'next_cursor': 3}
+
+
+def test_parts_forecast(client, monkeypatch):
+    if parts_forecast.np is None:
+        pytest.skip("numpy not installed")
+
+    def execute_query(query, *args, **kwargs):
+        if query is parts_forecast.PARTS_QUERY:
+            return Rows(('ID', 'Name', 'Stock'), [(1, 'Filter', 2), (2, 'Wiper', 50)])
+        return Rows(('Part_ID', 'Days_Ago', 'Quantity'), [(1, day, 1) for day in range(30)])
+    monkeypatch.setattr(parts_forecast, 'execute_query', execute_query)
+    login(client, 'manager')
+
+    response = client.get('/api/manager/parts/forecast?reorder_only=true')
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert [row['Part_ID'] for row in data] == [1]
+    assert data[0]['Needs_Reorder'] is True
@@ -0,0 +1,20 @@
+import pytest
+
+import db_utils
+
+
+@pytest.fixture
+def broken_db(monkeypatch):
+    def get_db_connection():
+        raise ConnectionError("database unavailable")
+    monkeypatch.setattr(db_utils, 'get_db_connection', get_db_connection)
+
+
+def test_errors_give_empty_results_by_default(broken_db):
+    assert db_utils.execute_query("SELECT * FROM Part") == []
+    assert db_utils.execute_query("SELECT * FROM Part", fetch_one=True) is None
+
+
+def test_raise_errors(broken_db):
+    with pytest.raises(ConnectionError):
+        db_utils.execute_query("SELECT * FROM Part", raise_errors=True)
@@ -0,0 +1,53 @@
+import datetime
+import decimal
+import json
+
+import pytest
+from flask import Flask
+
+import json_provider
+from json_provider import CHUNK_ROWS, FastJSONProvider, TupleRows
+
+COLUMNS = ('ID', 'Price', 'Sales_Date', 'Name')
+
+
+def table(n):
+    return TupleRows(COLUMNS, [(i, decimal.Decimal(f"{i}.50"), datetime.date(2024, 1, 1 + i % 28), f"row {i}")
+                               for i in range(n)])
+
+
+def expected(n):
+    return [{'ID': i, 'Price': i + 0.5, 'Sales_Date': f"2024-01-{1 + i % 28:02d}", 'Name': f"row {i}"}
+            for i in range(n)]
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def provider(request, monkeypatch):
+    if request.param == 'orjson' and json_provider.orjson is None:
+        pytest.skip("orjson not installed")
+    if request.param == 'stdlib':
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    app = Flask(__name__)
+    with app.app_context():
+        yield FastJSONProvider(app)
+
+
+@pytest.mark.parametrize('n', [0, 1, CHUNK_ROWS, CHUNK_ROWS + 1])
+def test_tuple_rows(provider, n):
+    assert json.loads(provider.dumps(table(n))) == expected(n)
+    assert json.loads(provider.dumps({'data': table(n), 'count': n})) == {'data': expected(n), 'count': n}
+
+
+def test_keys_are_sorted_like_flask(provider):
+    assert provider.dumps({'b': TupleRows(('z', 'a'), [(1, 2)]), 'a': 1}) == '{"a":1,"b":[{"a":2,"z":1}]}'
+
+
+def test_encoders_agree(monkeypatch):
+    if json_provider.orjson is None:
+        pytest.skip("orjson not installed")
+    app = Flask(__name__)
+    provider = FastJSONProvider(app)
+    with app.app_context():
+        fast = provider.dumps({'data': table(50)})
+        monkeypatch.setattr(json_provider, 'orjson', None)
+        assert provider.dumps({'data': table(50)}) == fast
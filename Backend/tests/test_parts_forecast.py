@@ -0,0 +1,82 @@
+import pytest
+
+import db_utils
+import parts_forecast
+
+np = pytest.importorskip('numpy')
+
+# (ID, Name, Stock)
+PARTS = [(10, 'Filter', 3), (20, 'Brake pad', 100), (30, 'Wiper', 0)]
+
+
+def forecast(usage, **options):
+    result = parts_forecast.forecast(PARTS, usage, **options)
+    return [dict(zip(result.columns, row)) for row in result.rows]
+
+
+def test_demand_matrix_places_usage_by_day():
+    usage = [(10, 0, 2), (10, 3, 1), (30, 1, 5)]
+    demand = parts_forecast.demand_matrix(np.array([10, 20, 30]), usage, 7)
+
+    assert demand.shape == (3, 7)
+    assert demand[0, -1] == 2      # today
+    assert demand[0, -4] == 1      # three days ago
+    assert demand[2, -2] == 5
+    assert demand[1].sum() == 0
+
+
+def test_demand_matrix_drops_unknown_parts_and_days_outside_the_window():
+    usage = [(99, 0, 4), (10, 7, 4), (10, -1, 4), (20, 6, 1)]
+    demand = parts_forecast.demand_matrix(np.array([20, 10]), usage, 7)
+    assert demand.sum() == 1
+    assert demand[0, 0] == 1
+
+
+def test_demand_matrix_with_unsorted_ids():
+    demand = parts_forecast.demand_matrix(np.array([30, 10, 20]), [(10, 0, 1), (20, 0, 2), (30, 0, 3)], 2)
+    assert demand[:, -1].tolist() == [3, 1, 2]
+
+
+def test_empty_history():
+    assert parts_forecast.demand_matrix(np.array([1, 2]), [], 5).shape == (2, 5)
+    rows = forecast([], history_days=30, window_days=7)
+    assert not any(row['Needs_Reorder'] for row in rows)
+
+
+def test_forecast_reorder_point():
+    # Filter: 1 unit a day for the last 10 days, steady, so no safety stock
+    usage = [(10, day, 1) for day in range(10)]
+    rows = forecast(usage, history_days=30, window_days=10, lead_time_days=7, review_days=14)
+
+    first = rows[0]
+    assert first['Part_ID'] == 10
+    assert first['Avg_Daily_Window'] == 1.0
+    assert first['Safety_Stock'] == 0.0
+    assert first['Reorder_Point'] == 7.0
+    assert first['Needs_Reorder'] is True
+    # Up to reorder point + 14 days of use, less what's in stock
+    assert first['Suggested_Order'] == 7 + 14 - 3
+    assert first['Days_Of_Cover'] == 3.0
+    assert first['Used_In_History'] == 10
+
+    unused = {row['Part_ID']: row for row in rows[1:]}
+    assert unused[30]['Needs_Reorder'] is False
+    assert unused[30]['Days_Of_Cover'] is None
+    assert unused[20]['Suggested_Order'] == 0
+
+
+def test_variable_demand_adds_safety_stock():
+    usage = [(20, day, 10 if day % 2 else 0) for day in range(20)]
+    row = next(r for r in forecast(usage, history_days=20, window_days=20) if r['Part_ID'] == 20)
+    assert row['Daily_Std'] == 5.0
+    assert row['Safety_Stock'] > 0
+    assert row['Reorder_Point'] == pytest.approx(5 * 7 + row['Safety_Stock'], abs=0.01)
+
+
+def test_load_forecast_raises_when_a_query_fails(monkeypatch):
+    def get_db_connection():
+        raise ConnectionError("database unavailable")
+    monkeypatch.setattr(db_utils, 'get_db_connection', get_db_connection)
+
+    with pytest.raises(ConnectionError):
+        parts_forecast.load_forecast(history_days=30)
@@ -0,0 +1,186 @@
+import sys
+import time
+import types
+
+import pytest
+
+from db_utils import Rows
+from query_cache import MemoryBackend, QueryCache, RedisBackend, is_write, tables_in, with_derived
+
+
+def test_tables_in_reads_and_joins():
+    query = """
+        SELECT so.ID FROM SalesOrder so
+        JOIN `Customer` c ON so.Customer_ID = c.ID
+        LEFT JOIN autobase.Employee e ON so.Sales_Employee_ID = e.ID
+    """
+    assert tables_in(query) == {'salesorder', 'customer', 'employee'}
+
+
+def test_tables_in_writes():
+    assert tables_in("INSERT INTO Vehicle (VIN) VALUES (%s)") == {'vehicle'}
+    assert tables_in("UPDATE Part SET Stock = Stock - 1 WHERE ID = %s") == {'part'}
+    assert tables_in("DELETE FROM ServiceLineUsePart WHERE ID = %s") == {'servicelineusepart'}
+
+
+def test_is_write():
+    assert is_write("  insert into Vehicle VALUES (1)")
+    assert is_write("REPLACE INTO Part VALUES (1)")
+    assert not is_write("SELECT * FROM Vehicle")
+
+
+def test_with_derived_adds_trigger_tables():
+    assert with_derived({'servicelineusepart'}) == {'servicelineusepart', 'partusage', 'serviceordercost'}
+    assert with_derived({'part'}) == {'part', 'serviceordercost'}
+    assert with_derived({'vehicle'}) == {'vehicle'}
+
+
+def test_invalidate_drops_only_tagged_entries():
+    cache = QueryCache(MemoryBackend())
+    cache.set('a', [{'ID': 1}], {'vehicle'})
+    cache.set('b', [{'ID': 2}], {'vehicle', 'salesorder'})
+    cache.set('c', [{'ID': 3}], {'part'})
+
+    cache.invalidate_tables({'salesorder'})
+
+    assert cache.get('a') == [{'ID': 1}]
+    assert cache.get('b') is None
+    assert cache.get('c') == [{'ID': 3}]
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_write_to_source_table_evicts_derived_results():
+    cache = QueryCache(MemoryBackend())
+    cache.set('usage', [{'Part_ID': 1, 'Times_Used': 4}], {'part', 'partusage'})
+    cache.invalidate_tables(with_derived({'servicelineusepart'}))
+    assert cache.get('usage') is None
+
+
+def test_entries_expire():
+    backend = MemoryBackend()
+    backend.set('k', [1], {'vehicle'}, ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get('k') is None
+
+
+def test_lru_bound():
+    backend = MemoryBackend(max_entries=2)
+    for key in 'abc':
+        backend.set(key, [key], {'t'}, ttl=60)
+    assert backend.get('a') is None
+    assert backend.get('c') == ['c']
+    assert backend.evictions == 1
+
+
+def test_get_returns_copies_of_dict_rows():
+    cache = QueryCache(MemoryBackend())
+    cache.set('k', [{'ID': 1}], {'vehicle'})
+    cache.get('k')[0]['ID'] = 99
+    cache.set('one', {'ID': 1}, {'vehicle'})
+    cache.get('one')['ID'] = 99
+
+    assert cache.get('k') == [{'ID': 1}]
+    assert cache.get('one') == {'ID': 1}
+
+
+def test_compact_rows_are_read_only():
+    cache = QueryCache(MemoryBackend())
+    cache.set('k', Rows(('ID', 'Name'), [(1, 'a')]), {'part'})
+    rows = cache.get('k')
+    assert rows[0]['Name'] == 'a'
+    with pytest.raises(TypeError):
+        rows[0]['Name'] = 'b'
+    assert cache.get('k')[0]['Name'] == 'a'
+
+
+class FakeRedis:
+    """Just enough of redis.Redis for RedisBackend, with a manual clock"""
+
+    next_version = '7.0.0'
+
+    def __init__(self, version):
+        self.version = version
+        self.now = 0
+        self.data = {}
+        self.expires = {}
+
+    @classmethod
+    def from_url(cls, url):
+        return cls(FakeRedis.next_version)
+
+    def _alive(self, name):
+        if name in self.expires and self.expires[name] <= self.now:
+            self.data.pop(name, None)
+            self.expires.pop(name)
+        return name in self.data
+
+    def info(self, section):
+        return {'redis_version': self.version}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def get(self, name):
+        return self.data[name] if self._alive(name) else None
+
+    def set(self, name, value, ex=None):
+        self.data[name] = value
+        self.expires[name] = self.now + ex
+
+    def sadd(self, name, member):
+        if not self._alive(name):
+            self.data[name] = set()
+        self.data[name].add(member.encode())
+
+    def smembers(self, name):
+        return set(self.data[name]) if self._alive(name) else set()
+
+    def ttl(self, name):
+        if not self._alive(name):
+            return -2
+        return self.expires[name] - self.now if name in self.expires else -1
+
+    def expire(self, name, seconds, nx=False, gt=False):
+        assert self.version >= '7' or not (nx or gt)
+        current = self.ttl(name)
+        if current == -2 or (nx and current != -1) or (gt and (current == -1 or seconds <= current)):
+            return False
+        self.expires[name] = self.now + seconds
+        return True
+
+    def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+            self.expires.pop(name, None)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+@pytest.mark.parametrize('version', ['7.2.4', '6.2.14'])
+def test_redis_tag_set_outlives_its_longest_entry(monkeypatch, version):
+    FakeRedis.next_version = version
+    monkeypatch.setitem(sys.modules, 'redis', types.SimpleNamespace(Redis=FakeRedis))
+    backend = RedisBackend('redis://test')
+    client = backend._client
+
+    # Long-lived forecast history, then a short-lived listing on the same table
+    backend.set('history', [1], {'part'}, ttl=300)
+    backend.set('listing', [2], {'part'}, ttl=30)
+    assert client.ttl(backend.prefix + 'tag:part') == 300
+
+    client.now = 60  # the listing has expired; the history entry hasn't
+    assert backend.get('listing') is None
+    assert backend.get('history') == [1]
+
+    assert backend.invalidate_tags({'part'}) == 2
+    assert backend.get('history') is None
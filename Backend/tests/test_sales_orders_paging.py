@@ -0,0 +1,35 @@
+import pytest
+
+from employee_routes import sales_orders_page, sales_orders_query
+
+
+def test_first_page_fetches_one_extra_row():
+    query, params, limit = sales_orders_query({'limit': '10'})
+    assert 'WHERE' not in query
+    assert params == (11,)
+    assert limit == 10
+
+
+def test_after_continues_below_the_cursor():
+    query, params, limit = sales_orders_query({'after': '500', 'employee_id': '3', 'limit': '5'})
+    assert 'so.ID < %s' in query
+    assert 'so.Sales_Employee_ID = %s' in query
+    assert params == (500, 3, 6)
+
+
+def test_limit_is_clamped():
+    assert sales_orders_query({'limit': '100000'})[2] == 200
+    assert sales_orders_query({'limit': '0'})[2] == 1
+
+
+@pytest.mark.parametrize('args', [{'after': 'abc'}, {'limit': 'x'}, {'date_from': '2024-13-01'},
+                                  {'status': 'open'}])
+def test_bad_arguments(args):
+    with pytest.raises(ValueError):
+        sales_orders_query(args)
+
+
+def test_page_sets_cursor_only_when_more_rows_exist():
+    rows = [{'ID': i} for i in (9, 8, 7)]
+    assert sales_orders_page(rows, 2) == {'sales_orders': rows[:2], 'next_cursor': 8}
+    assert sales_orders_page(rows, 3) == {'sales_orders': rows, 'next_cursor': None}
@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+
+import pytest
+
+import db_utils
+from slow_query_log import SlowQueryLog, normalize
+
+
+@pytest.mark.parametrize('query, expected', [
+    ("SELECT *\n  FROM   Part\n WHERE ID = 42", "SELECT * FROM Part WHERE ID = ?"),
+    ("SELECT * FROM Customer WHERE Name = 'O\\'Brien' AND Price > 10.5",
+     "SELECT * FROM Customer WHERE Name = ? AND Price > ?"),
+    ("SELECT ID AS 'Employee ID' FROM Employee", "SELECT ID AS 'Employee ID' FROM Employee"),
+    ("SELECT * FROM Part WHERE ID IN (%s, %s, %s)", "SELECT * FROM Part WHERE ID IN (...)"),
+    ("SELECT * FROM Part WHERE ID IN (?,?)", "SELECT * FROM Part WHERE ID IN (...)"),
+    ("SELECT * FROM Part WHERE ID = %s", "SELECT * FROM Part WHERE ID = %s"),
+])
+def test_normalize(query, expected):
+    assert normalize(query) == expected
+
+
+def test_in_lists_of_any_length_group_together():
+    assert normalize("SELECT 1 FROM t WHERE x IN (%s, %s)") == normalize("SELECT 1 FROM t WHERE x IN (%s,%s,%s)")
+
+
+def test_only_slow_statements_are_kept():
+    log = SlowQueryLog(threshold_ms=100, explain=False, enabled=True)
+    log.record(None, "SELECT * FROM Part WHERE ID = %s", (1,), 0.05, 1)
+    log.record(None, "SELECT * FROM Part WHERE ID = %s", (1,), 0.5, 1)
+    assert len(log._entries) == 1
+    assert log._entries[0]['params'] == ['int']
+
+
+class _PreparedCursor:
+    column_names = ('ID',)
+
+    def execute(self, sql, params):
+        pass
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class _RawConnection:
+    def cursor(self, prepared=False):
+        return _PreparedCursor()
+
+
+class _Connection:
+    def __init__(self, raw):
+        self.raw_connection = raw
+
+
+def test_execute_prepared_records_the_callers_query(monkeypatch):
+    raw = _RawConnection()
+
+    @contextmanager
+    def get_db_connection():
+        yield _Connection(raw)
+
+    recorded = []
+    monkeypatch.setattr(db_utils, 'get_db_connection', get_db_connection)
+    monkeypatch.setattr(db_utils.slow_query_log, 'record', lambda conn, query, *rest: recorded.append(query))
+
+    # Equal text, different objects: the second call reuses the statement prepared for the first
+    first = ' '.join(["SELECT * FROM `Part`", "WHERE `ID` = %s"])
+    second = ' '.join(["SELECT * FROM `Part`", "WHERE `ID` = %s"])
+    assert db_utils.execute_prepared(first, (1,)) == [{'ID': 1}]
+    assert db_utils.execute_prepared(second, (2,)) == [{'ID': 1}]
+    assert recorded[0] is first and recorded[1] is second
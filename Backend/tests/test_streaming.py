@@ -0,0 +1,43 @@
+import json
+
+import pytest
+from flask import Flask
+
+from streaming import CHUNK_ROWS, _chunks, stream_json, stream_ndjson
+
+COUNTS = [0, 1, CHUNK_ROWS - 1, CHUNK_ROWS, CHUNK_ROWS + 1, 2 * CHUNK_ROWS]
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    with app.test_request_context():
+        yield app
+
+
+def rows(n):
+    return ({'ID': i, 'Name': f"row {i}"} for i in range(n))
+
+
+def body(response):
+    return response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('n', COUNTS)
+def test_stream_json(app, n):
+    assert json.loads(body(stream_json('data', rows(n)))) == {'data': list(rows(n))}
+
+
+@pytest.mark.parametrize('n', COUNTS)
+def test_stream_ndjson(app, n):
+    text = body(stream_ndjson(rows(n)))
+    assert '\n\n' not in text
+    assert text.endswith('\n') == (n > 0)
+    assert [json.loads(line) for line in text.splitlines()] == list(rows(n))
+
+
+def test_chunks_hold_chunk_rows_each():
+    chunks = list(_chunks(0, iter(range(1, 2 * CHUNK_ROWS)), str, ','))
+    assert len(chunks) == 2
+    assert chunks[0].count(',') == CHUNK_ROWS
+    assert not chunks[-1].endswith(',')
@@ -0,0 +1,46 @@
+import pytest
+
+from vehicle_routes import _decode_cursor, _encode_cursor, vehicles_page, vehicles_query
+
+VEHICLE = {'VIN': '1HGCM82633A004352', 'Make': 'Honda', 'Model': 'Accord', 'Year': 2003,
+           'Color': 'Blue', 'Mileage': 120000, 'Price': 4500}
+
+
+def test_cursor_round_trip():
+    cursor = _encode_cursor(VEHICLE)
+    assert _decode_cursor(cursor) == ['Honda', 'Accord', 2003, '1HGCM82633A004352']
+
+
+def test_cursor_is_url_safe():
+    cursor = _encode_cursor(dict(VEHICLE, Model='?/+&' * 5))
+    assert not set(cursor) & set('+/?&')
+
+
+@pytest.mark.parametrize('cursor', ['not base64!', 'WzEsMl0=', 'eyJhIjogMX0=', '%%%'])
+def test_bad_cursor(cursor):
+    # [1,2] and {"a": 1} decode but aren't a 4-item key
+    with pytest.raises(ValueError):
+        _decode_cursor(cursor)
+
+
+def test_after_adds_keyset_condition():
+    query, params, limit = vehicles_query({'after': _encode_cursor(VEHICLE), 'limit': '2'})
+    assert '(v.Make, v.Model, v.Year, v.VIN) > (%s, %s, %s, %s)' in query
+    assert params == ('Honda', 'Accord', 2003, '1HGCM82633A004352', 3)
+    assert limit == 2
+
+
+def test_no_limit_returns_everything():
+    query, params, limit = vehicles_query({'make': 'Kia'})
+    assert 'LIMIT' not in query
+    assert params == ('Kia',)
+    assert limit is None
+
+
+def test_page_cursor_points_at_last_row_returned():
+    rows = [dict(VEHICLE, VIN=f"VIN{i}") for i in range(3)]
+    page = vehicles_page(rows, 2)
+    assert page['vehicle'] == rows[:2]
+    assert _decode_cursor(page['next_cursor'])[3] == 'VIN1'
+    assert vehicles_page(rows, 3)['next_cursor'] is None
+    assert vehicles_page([], None) == {'vehicle': [], 'next_cursor': None}
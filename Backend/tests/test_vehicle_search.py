@@ -0,0 +1,78 @@
+import vehicle_search
+from vehicle_search import InventoryIndex
+
+INVENTORY = [
+    {'VIN': 'V1', 'Make': 'Honda', 'Model': 'Civic', 'Color': 'Blue', 'Year': 2018, 'Mileage': 40000, 'Price': 15000},
+    {'VIN': 'V2', 'Make': 'Honda', 'Model': 'Accord', 'Color': 'Red', 'Year': 2021, 'Mileage': 10000, 'Price': 24000},
+    {'VIN': 'V3', 'Make': 'Ford', 'Model': 'F-150', 'Color': 'Red', 'Year': 2016, 'Mileage': 80000, 'Price': 21000},
+    {'VIN': 'V4', 'Make': 'Kia', 'Model': 'Rio', 'Color': 'Blue', 'Year': 2022, 'Mileage': 5000, 'Price': 90000},
+]
+
+
+def index(monkeypatch, rows=INVENTORY):
+    monkeypatch.setattr(vehicle_search, 'stream_query', lambda query: iter(rows))
+    return InventoryIndex(ttl=60)
+
+
+def test_facets_ignore_their_own_filter(monkeypatch):
+    result = index(monkeypatch).search(makes=['Honda'])
+
+    assert [v['VIN'] for v in result['vehicles']] == ['V1', 'V2']
+    # Other makes stay selectable; the other facets follow the make filter
+    assert result['facets']['Make'] == {'Honda': 2, 'Ford': 1, 'Kia': 1}
+    assert result['facets']['Model'] == {'Civic': 1, 'Accord': 1}
+    assert result['facets']['Color'] == {'Blue': 1, 'Red': 1}
+
+
+def test_facets_with_several_filters(monkeypatch):
+    result = index(monkeypatch).search(makes=['Honda'], colors=['Red'])
+
+    assert [v['VIN'] for v in result['vehicles']] == ['V2']
+    assert result['facets']['Make'] == {'Honda': 1, 'Ford': 1}   # red cars, any make
+    assert result['facets']['Color'] == {'Blue': 1, 'Red': 1}    # Hondas, any color
+    assert result['facets']['Model'] == {'Accord': 1}
+    assert result['facets']['Year'] == {'2020-2024': 1}
+
+
+def test_year_facet_ignores_the_year_range(monkeypatch):
+    result = index(monkeypatch).search(year_range=(2020, None))
+    assert result['total'] == 2
+    assert result['facets']['Year'] == {'2015-2019': 2, '2020-2024': 2}
+    assert result['facets']['Make'] == {'Honda': 1, 'Kia': 1}
+
+
+def test_price_and_mileage_filters_apply_to_every_facet(monkeypatch):
+    result = index(monkeypatch).search(makes=['Honda'], price_range=(None, 50000))
+    assert result['facets']['Make'] == {'Honda': 2, 'Ford': 1}
+
+
+def test_sold_vehicles_are_dropped(monkeypatch):
+    inventory = index(monkeypatch)
+    inventory.search()
+    inventory.mark_sold('V1')
+    assert 'V1' not in [v['VIN'] for v in inventory.search()['vehicles']]
+
+
+def test_sale_during_reload_is_not_lost(monkeypatch):
+    inventory = index(monkeypatch)
+    inventory.search()
+
+    def stream_query(query):
+        # The query's snapshot still has V2 unsold, but the sale commits and is
+        # marked before the new index is installed
+        rows = list(INVENTORY)
+        inventory.mark_sold('V2')
+        return iter(rows)
+
+    monkeypatch.setattr(vehicle_search, 'stream_query', stream_query)
+    inventory.load()
+
+    assert 'V2' not in [v['VIN'] for v in inventory.search()['vehicles']]
+
+
+def test_old_sales_are_forgotten_after_a_reload(monkeypatch):
+    inventory = index(monkeypatch)
+    inventory.search()
+    inventory.mark_sold('V1')
+    inventory.load()  # the sale committed before this query started
+    assert inventory._recent_sales == {}
@@ -1,32 +1,162 @@
 from flask import Blueprint, jsonify, session, request
-from db_utils import execute_query
+from db_utils import execute_query, transaction
+from inventory import mark_sold
+from sales_rollup import record_sale
+from vehicle_search import inventory_index, SORT_FIELDS
+import base64
+import json
+from app_logging import get_logger, SAMPLED
+from conditional import etag_from
 
 vehicle_bp = Blueprint('vehicle', __name__)
+logger = get_logger(__name__)
+
+VEHICLES_MAX_PAGE_SIZE = 200
+
+
+def _encode_cursor(vehicle):
+    key = [vehicle['Make'], vehicle['Model'], vehicle['Year'], vehicle['VIN']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(key, list) or len(key) != 4:
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def vehicles_query(args):
+    """Build the /vehicles SELECT from query args -> (query, params, limit).
+    Raises ValueError/TypeError on bad input. Shared with the async path in asgi.py.
+    """
+    conditions = ["v.Is_Sold = 0"]
+    params = []
+
+    for arg, condition, convert in (
+        ('make', "v.Make = %s", str),
+        ('model', "v.Model = %s", str),
+        ('year_min', "v.Year >= %s", int),
+        ('year_max', "v.Year <= %s", int),
+        ('price_min', "v.Price >= %s", float),
+        ('price_max', "v.Price <= %s", float),
+    ):
+        if args.get(arg):
+            conditions.append(condition)
+            params.append(convert(args[arg]))
+
+    limit = None
+    if args.get('limit'):
+        limit = max(1, min(int(args['limit']), VEHICLES_MAX_PAGE_SIZE))
+    if args.get('after'):
+        # Keyset on the sort order so deep pages cost the same as the first
+        conditions.append("(v.Make, v.Model, v.Year, v.VIN) > (%s, %s, %s, %s)")
+        params.extend(_decode_cursor(args['after']))
+
+    query = f"""
+        SELECT v.VIN, v.Make, v.Model, v.Color, v.Year, v.Mileage, v.Price
+        FROM Vehicle v
+        WHERE {' AND '.join(conditions)}
+        ORDER BY v.Make, v.Model, v.Year, v.VIN
+    """
+    if limit is not None:
+        # One extra row tells us whether there is another page
+        query += " LIMIT %s"
+        params.append(limit + 1)
+    return query, tuple(params), limit
+
+
+def vehicles_page(vehicles, limit):
+    """Trim the extra row fetched by vehicles_query and build the response body"""
+    next_cursor = None
+    if limit is not None and len(vehicles) > limit:
+        vehicles = vehicles[:limit]
+        next_cursor = _encode_cursor(vehicles[-1])
+    return {'vehicle': vehicles or [], 'next_cursor': next_cursor}
+
 
 @vehicle_bp.route('/vehicles', methods=['GET'])
+@etag_from('Vehicle')
 def get_vehicles():
-    """Get all vehicles that haven't been sold yet"""
+    """Get all vehicles that haven't been sold yet.
+    Optional query params: make, model, year_min, year_max, price_min, price_max,
+    limit and after (next_cursor from the previous page)
+    """
     try:
-        query = """
-            SELECT v.VIN, v.Make, v.Model, v.Color, v.Year, v.Mileage, v.Price
-            FROM Vehicle v
-            WHERE v.VIN NOT IN (SELECT Vehicle_VIN FROM SalesOrder)
-            ORDER BY v.Make, v.Model, v.Year
-        """
-
-        vehicles = execute_query(query)
-        
-        if vehicles:
-            print(f"Fetched {len(vehicles)} available vehicles")
-            return jsonify({'vehicle': vehicles}), 200
-        else:
-            return jsonify({'vehicle': []}), 200
+        query, params, limit = vehicles_query(request.args)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid filter or paging parameter'}), 400
+
+    try:
+        # A purchase evicts this entry on the worker that handled it; with the memory
+        # cache, other workers can list a sold vehicle for up to cache_ttl seconds
+        vehicles = execute_query(query, params, cache_ttl=30, compact=True)
+        page = vehicles_page(vehicles, limit)
+
+        if page['vehicle']:
+            logger.info("Fetched %d available vehicles", len(page['vehicle']), extra=SAMPLED)
+        return jsonify(page), 200
             
-    except Exception as e:
-        print(f"Error in get_vehicles: {str(e)}")
+    except Exception:
+        logger.exception("Error in get_vehicles")
         return jsonify({'error': 'Failed to fetch vehicles'}), 500
 
 
+def _list_arg(name):
+    # Accept both ?make=Ford&make=Kia and ?make=Ford,Kia
+    values = []
+    for value in request.args.getlist(name):
+        values.extend(v.strip() for v in value.split(',') if v.strip())
+    return values
+
+
+def _range_arg(name, convert):
+    low = request.args.get(f'{name}_min')
+    high = request.args.get(f'{name}_max')
+    return (convert(low) if low else None, convert(high) if high else None)
+
+
+@vehicle_bp.route('/search', methods=['GET'])
+def search_vehicles():
+    """Search unsold inventory from the in-memory index, with facet counts.
+    Query params: make, model, color (repeatable or comma-separated),
+    year_min/year_max, price_min/price_max, mileage_min/mileage_max,
+    sort=price|year|mileage|make|model, order=asc|desc, limit, offset
+    """
+    args = request.args
+    sort = args.get('sort', 'price')
+    if sort not in SORT_FIELDS:
+        return jsonify({'error': 'Invalid sort field'}), 400
+
+    try:
+        limit = max(1, min(int(args.get('limit', 50)), VEHICLES_MAX_PAGE_SIZE))
+        offset = max(0, int(args.get('offset', 0)))
+        filters = {
+            'makes': _list_arg('make'),
+            'models': _list_arg('model'),
+            'colors': _list_arg('color'),
+            'year_range': _range_arg('year', int),
+            'price_range': _range_arg('price', float),
+            'mileage_range': _range_arg('mileage', float),
+        }
+    except ValueError:
+        return jsonify({'error': 'Invalid filter or paging parameter'}), 400
+
+    try:
+        result = inventory_index.search(
+            sort=sort,
+            descending=args.get('order') == 'desc',
+            limit=limit,
+            offset=offset,
+            **filters
+        )
+        return jsonify(result), 200
+
+    except Exception:
+        logger.exception("Error in search_vehicles")
+        return jsonify({'error': 'Failed to search vehicles'}), 500
+
+
 @vehicle_bp.route('/vehicles/buy/<vin>', methods=['POST'])
 def buy_vehicle(vin):
     """Customer purchases a vehicle"""
@@ -43,40 +173,43 @@ def buy_vehicle(vin):
         return jsonify({'error': 'Price is required'}), 400
 
     try:
-        # Check if vehicle exists and is not already sold
-        check_query = """
-            SELECT VIN, Price 
-            FROM Vehicle 
-            WHERE VIN = %s AND VIN NOT IN (SELECT Vehicle_VIN FROM SalesOrder)
-        """
-        vehicle = execute_query(check_query, (vin,), fetch_one=True)
-        
-        if not vehicle:
-            return jsonify({'error': 'Vehicle not available for purchase'}), 404
-        
-        # Create sales order (Sales_Employee_ID is NULL initially, can be assigned later)
-        insert_query = """
-            INSERT INTO SalesOrder (Customer_ID, Sales_Employee_ID, Vehicle_VIN, Sales_Date, Price) 
-            VALUES (%s, NULL, %s, CURDATE(), %s)
-        """
-        result = execute_query(insert_query, (customer_id, vin, price))
-        
-        if result is False:
-            return jsonify({'error': 'Failed to create sales order'}), 500
-        
-        # Add vehicle to customer's owned vehicles
-        ownership_query = """
-            INSERT INTO CustomerOwnVehicle (Customer_ID, Vehicle_VIN) 
-            VALUES (%s, %s)
-        """
-        ownership_result = execute_query(ownership_query, (customer_id, vin))
-        
-        if ownership_result is False:
-            return jsonify({'error': 'Failed to assign vehicle ownership'}), 500
+        # Check, order and ownership commit together on one connection; the row
+        # lock on the Vehicle makes a concurrent buyer of the same VIN wait here
+        with transaction() as tx:
+            # Check if vehicle exists and is not already sold
+            check_query = """
+                SELECT VIN, Price 
+                FROM Vehicle 
+                WHERE VIN = %s AND Is_Sold = 0
+            """
+            vehicle = tx.execute(check_query, (vin,), fetch_one=True, for_update=True)
+            
+            if not vehicle:
+                return jsonify({'error': 'Vehicle not available for purchase'}), 404
+            
+            # Create sales order (Sales_Employee_ID is NULL initially, can be assigned later)
+            insert_query = """
+                INSERT INTO SalesOrder (Customer_ID, Sales_Employee_ID, Vehicle_VIN, Sales_Date, Price) 
+                VALUES (%s, NULL, %s, CURDATE(), %s)
+            """
+            tx.execute(insert_query, (customer_id, vin, price))
+            
+            # Add vehicle to customer's owned vehicles
+            ownership_query = """
+                INSERT INTO CustomerOwnVehicle (Customer_ID, Vehicle_VIN) 
+                VALUES (%s, %s)
+            """
+            tx.execute(ownership_query, (customer_id, vin))
+            
+            # Keep the availability flag and manager sales rollups current in the same commit
+            mark_sold(tx, vin)
+            record_sale(tx, price)
         
-        print(f"Customer {customer_id} purchased vehicle {vin}")
+        inventory_index.mark_sold(vin)
+
+        logger.info("Customer %s purchased vehicle %s", customer_id, vin)
         return jsonify({'message': 'Vehicle purchased successfully!'}), 200
         
-    except Exception as e:
-        print(f"Error buying vehicle: {str(e)}")
+    except Exception:
+        logger.exception("Error buying vehicle")
         return jsonify({'error': 'Failed to complete purchase'}), 500
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""In-memory index of unsold inventory behind /api/vehicle/search.
+
+Attributes are stored column by column (string columns dictionary-encoded to
+small ints), so a search is one pass over flat arrays that filters rows and
+counts facets at the same time, without touching MySQL. Facets are
+disjunctive: each one is counted over rows matching every filter except its
+own, so picking a make still lists the other makes. The index reloads
+after INVENTORY_INDEX_TTL seconds and drops VINs as soon as they are sold
+through this worker.
+"""
+import os
+import threading
+import time
+from array import array
+
+from db_utils import stream_query
+
+YEAR_BUCKET_SIZE = 5
+
+SORT_FIELDS = ('price', 'year', 'mileage', 'make', 'model')
+
+
+class _Snapshot:
+    def __init__(self, rows):
+        self.size = len(rows)
+        self.vin = [row['VIN'] for row in rows]
+        self.position = {vin: i for i, vin in enumerate(self.vin)}
+
+        # Dictionary-encoded string columns: codes[i] indexes into values
+        self.values = {}
+        self.codes = {}
+        for column in ('Make', 'Model', 'Color'):
+            lookup = {}
+            codes = array('i')
+            for row in rows:
+                codes.append(lookup.setdefault(row[column], len(lookup)))
+            self.values[column] = list(lookup)
+            self.codes[column] = codes
+
+        self.year = array('i', (int(row['Year'] or 0) for row in rows))
+        self.mileage = array('d', (float(row['Mileage'] or 0) for row in rows))
+        self.price = array('d', (float(row['Price'] or 0) for row in rows))
+        self.sold = bytearray(self.size)
+
+    def mark_sold(self, vin):
+        if vin in self.position:
+            self.sold[self.position[vin]] = 1
+
+    def code_set(self, column, wanted):
+        lookup = {value: code for code, value in enumerate(self.values[column])}
+        return {lookup[value] for value in wanted if value in lookup}
+
+    def row(self, i):
+        return {
+            'VIN': self.vin[i],
+            'Make': self.values['Make'][self.codes['Make'][i]],
+            'Model': self.values['Model'][self.codes['Model'][i]],
+            'Color': self.values['Color'][self.codes['Color'][i]],
+            'Year': self.year[i],
+            'Mileage': self.mileage[i],
+            'Price': self.price[i],
+        }
+
+
+class InventoryIndex:
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._load_lock = threading.Lock()
+        # VIN -> when mark_sold() saw it; guards the swap so no mark is lost
+        self._recent_sales = {}
+        self._sales_lock = threading.Lock()
+
+    def load(self):
+        started = time.monotonic()
+        # stream_query raises on failure, so a DB error never installs an empty index
+        rows = list(stream_query("""
+            SELECT VIN, Make, Model, Color, Year, Mileage, Price
+            FROM Vehicle
+            WHERE Is_Sold = 0
+        """))
+        snapshot = _Snapshot(rows)
+        with self._sales_lock:
+            # A sale marked after the query started may have committed too late for
+            # its result; older ones are already excluded by Is_Sold
+            self._recent_sales = {vin: at for vin, at in self._recent_sales.items() if at >= started}
+            for vin in self._recent_sales:
+                snapshot.mark_sold(vin)
+            # Swap in one assignment so concurrent searches see old or new, never half
+            self._snapshot = snapshot
+        self._loaded_at = time.monotonic()
+        return snapshot
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._loaded_at <= self.ttl:
+            return snapshot
+        with self._load_lock:
+            if self._snapshot is not snapshot:
+                return self._snapshot
+            return self.load()
+
+    def mark_sold(self, vin):
+        with self._sales_lock:
+            self._recent_sales[vin] = time.monotonic()
+            if self._snapshot is not None:
+                self._snapshot.mark_sold(vin)
+
+    def search(self, makes=(), models=(), colors=(), year_range=(None, None),
+               price_range=(None, None), mileage_range=(None, None),
+               sort='price', descending=False, limit=50, offset=0):
+        snap = self._current()
+
+        make_codes = snap.code_set('Make', makes) if makes else None
+        model_codes = snap.code_set('Model', models) if models else None
+        color_codes = snap.code_set('Color', colors) if colors else None
+        year_min, year_max = year_range
+        price_min, price_max = price_range
+        mileage_min, mileage_max = mileage_range
+
+        make_col, model_col, color_col = snap.codes['Make'], snap.codes['Model'], snap.codes['Color']
+        year_col, price_col, mileage_col, sold = snap.year, snap.price, snap.mileage, snap.sold
+
+        make_counts = [0] * len(snap.values['Make'])
+        model_counts = [0] * len(snap.values['Model'])
+        color_counts = [0] * len(snap.values['Color'])
+        year_counts = {}
+        matches = []
+
+        for i in range(snap.size):
+            if sold[i]:
+                continue
+            price = price_col[i]
+            if (price_min is not None and price < price_min) or (price_max is not None and price > price_max):
+                continue
+            mileage = mileage_col[i]
+            if (mileage_min is not None and mileage < mileage_min) or (mileage_max is not None and mileage > mileage_max):
+                continue
+
+            # Filters with a facet of their own: a row failing exactly one of them
+            # still counts toward that facet
+            year = year_col[i]
+            miss_make = make_codes is not None and make_col[i] not in make_codes
+            miss_model = model_codes is not None and model_col[i] not in model_codes
+            miss_color = color_codes is not None and color_col[i] not in color_codes
+            miss_year = (year_min is not None and year < year_min) or (year_max is not None and year > year_max)
+            misses = miss_make + miss_model + miss_color + miss_year
+            if misses > 1:
+                continue
+
+            if not misses:
+                matches.append(i)
+            if not misses or miss_make:
+                make_counts[make_col[i]] += 1
+            if not misses or miss_model:
+                model_counts[model_col[i]] += 1
+            if not misses or miss_color:
+                color_counts[color_col[i]] += 1
+            if not misses or miss_year:
+                bucket = year - year % YEAR_BUCKET_SIZE
+                year_counts[bucket] = year_counts.get(bucket, 0) + 1
+
+        if sort in ('make', 'model'):
+            codes, values = snap.codes[sort.capitalize()], snap.values[sort.capitalize()]
+            key = lambda i: (values[codes[i]], snap.vin[i])
+        else:
+            column = {'price': price_col, 'year': year_col, 'mileage': mileage_col}[sort]
+            key = lambda i: (column[i], snap.vin[i])
+        matches.sort(key=key, reverse=descending)
+
+        def counts(values, tally):
+            return {values[code]: n for code, n in enumerate(tally) if n}
+
+        return {
+            'total': len(matches),
+            'vehicles': [snap.row(i) for i in matches[offset:offset + limit]],
+            'facets': {
+                'Make': counts(snap.values['Make'], make_counts),
+                'Model': counts(snap.values['Model'], model_counts),
+                'Color': counts(snap.values['Color'], color_counts),
+                'Year': {
+                    f"{bucket}-{bucket + YEAR_BUCKET_SIZE - 1}": year_counts[bucket]
+                    for bucket in sorted(year_counts)
+                },
+            },
+        }
+
+
+inventory_index = InventoryIndex(ttl=float(os.getenv('INVENTORY_INDEX_TTL', '60')))
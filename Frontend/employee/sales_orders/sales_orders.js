@@ -12,6 +12,9 @@ import {
 let allOrders = [];
 let allEmployees = [];
 let selectedOrderId = null;
+let nextCursor = null;
+
+const PAGE_SIZE = 50;
 
 // =========================
 // Page Initialization
@@ -31,6 +34,7 @@ document.addEventListener("DOMContentLoaded", async () => {
   
   // Load data in parallel
   await Promise.all([loadEmployees(), loadSalesOrders()]);
+  populateEmployeeFilter();
   
   setupEventListeners();
   setupModalListeners();
@@ -52,17 +56,36 @@ async function loadEmployees() {
   }
 }
 
-async function loadSalesOrders() {
+// Filters the backend applies before paging
+function buildServerParams() {
+  const params = new URLSearchParams({ limit: PAGE_SIZE });
+  const status = document.getElementById("statusFilter")?.value;
+  const employeeId = document.getElementById("employeeFilter")?.value;
+  const dateFrom = document.getElementById("dateFromFilter")?.value;
+  const dateTo = document.getElementById("dateToFilter")?.value;
+
+  if (status) params.set("status", status);
+  if (employeeId) params.set("employee_id", employeeId);
+  if (dateFrom) params.set("date_from", dateFrom);
+  if (dateTo) params.set("date_to", dateTo);
+  return params;
+}
+
+async function loadSalesOrders(append = false) {
   const loadingMessage = document.getElementById("loadingMessage");
   const errorMessage = document.getElementById("errorMessage");
   const ordersContainer = document.getElementById("ordersContainer");
+  const loadMoreBtn = document.getElementById("loadMoreBtn");
 
   showLoading(loadingMessage);
   if (errorMessage) errorMessage.style.display = "none";
-  if (ordersContainer) ordersContainer.innerHTML = "";
+  if (!append && ordersContainer) ordersContainer.innerHTML = "";
+
+  const params = buildServerParams();
+  if (append && nextCursor !== null) params.set("after", nextCursor);
 
   try {
-    const response = await fetch(`${BACKEND_URL}/api/employee/sales_orders`, {
+    const response = await fetch(`${BACKEND_URL}/api/employee/sales_orders?${params}`, {
       method: "GET",
       credentials: "include"
     });
@@ -72,13 +95,16 @@ async function loadSalesOrders() {
 
     if (!response.ok) throw new Error(data.error || `HTTP ${response.status}`);
 
-    allOrders = data.sales_orders || data || [];
+    const page = data.sales_orders || [];
+    allOrders = append ? allOrders.concat(page) : page;
+    nextCursor = data.next_cursor ?? null;
+    if (loadMoreBtn) loadMoreBtn.style.display = nextCursor !== null ? "inline-block" : "none";
 
     if (allOrders.length === 0) {
       ordersContainer.innerHTML = `<div class="no-orders"><p>No orders match your current filters.</p></div>`;
-    } else {
-      displayOrdersTable(allOrders, ordersContainer);
       updateStatistics(allOrders);
+    } else {
+      applyFilters();
     }
   } catch (error) {
     hideLoading(loadingMessage);
@@ -90,6 +116,18 @@ async function loadSalesOrders() {
   }
 }
 
+function populateEmployeeFilter() {
+  const employeeFilter = document.getElementById("employeeFilter");
+  if (!employeeFilter) return;
+
+  let optionsHtml = '<option value="">All employees</option>';
+  allEmployees.forEach(emp => {
+    const empName = (emp.Name || emp.name || `Employee #${emp.ID}`).trim();
+    optionsHtml += `<option value="${emp.ID}">${escapeHtml(empName)}</option>`;
+  });
+  employeeFilter.innerHTML = optionsHtml;
+}
+
 // =========================
 // Display Logic
 // =========================
@@ -224,6 +262,10 @@ function setupEventListeners() {
   document.getElementById("customerFilter")?.addEventListener("input", applyFilters);
   document.getElementById("orderIdFilter")?.addEventListener("input", applyFilters);
   document.getElementById("clearFilters")?.addEventListener("click", clearFilters);
+  ["statusFilter", "employeeFilter", "dateFromFilter", "dateToFilter"].forEach(id => {
+    document.getElementById(id)?.addEventListener("change", () => loadSalesOrders());
+  });
+  document.getElementById("loadMoreBtn")?.addEventListener("click", () => loadSalesOrders(true));
   
   const refreshBtn = document.getElementById("refreshBtn");
   if (refreshBtn) {
@@ -256,12 +298,11 @@ function applyFilters() {
 }
 
 function clearFilters() {
-  const cFilter = document.getElementById("customerFilter");
-  const iFilter = document.getElementById("orderIdFilter");
-  if (cFilter) cFilter.value = "";
-  if (iFilter) iFilter.value = "";
-  displayOrdersTable(allOrders, document.getElementById("ordersContainer"));
-  updateStatistics(allOrders);
+  ["customerFilter", "orderIdFilter", "statusFilter", "employeeFilter", "dateFromFilter", "dateToFilter"].forEach(id => {
+    const el = document.getElementById(id);
+    if (el) el.value = "";
+  });
+  loadSalesOrders();
 }
 
 function updateStatistics(orders) {
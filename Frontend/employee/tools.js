@@ -41,6 +41,19 @@ function renderTable(containerId, items, columns){
   table.appendChild(tbody); c.appendChild(table);
 }
 
+// Service endpoints nest lines and parts under each order; expand to one row per part for the table
+function flattenServiceOrders(orders){
+  const rows = [];
+  (orders || []).forEach(({lines = [], ...order})=>{
+    if(lines.length===0){ rows.push(order); return }
+    lines.forEach(({ID: lineId, parts = [], ...line})=>{
+      if(parts.length===0){ rows.push({...order, ...line}); return }
+      parts.forEach(part=>rows.push({...order, ...line, ...part}));
+    });
+  });
+  return rows;
+}
+
 // Sales by VIN
 document.getElementById('lookupSalesByVin').addEventListener('click', async ()=>{
   const vin = document.getElementById('vinInput').value.trim();
@@ -67,7 +80,7 @@ document.getElementById('lookupServiceByVin').addEventListener('click', async ()
   if(!vin) return alert('Enter VIN');
   try{
     const data = await getJson(`${BACKEND_URL}/api/employee/service/vehicle/${encodeURIComponent(vin)}`);
-    renderTable('serviceResults', data.service_orders || data, ['ID','Date_From','Date_To','ServiceStatus','Price','assigned_employee','service_type','labor_hours','labor_rate','part_name','part_price']);
+    renderTable('serviceResults', flattenServiceOrders(data.service_orders), ['ID','Date_From','Date_To','ServiceStatus','Price','assigned_employee','service_type','labor_hours','labor_rate','part_name','part_price']);
   }catch(e){console.error(e); alert('Error fetching service by VIN')}
 });
 
@@ -77,7 +90,7 @@ document.getElementById('lookupServiceByCustomer').addEventListener('click', asy
   if(!id) return alert('Enter customer ID');
   try{
     const data = await getJson(`${BACKEND_URL}/api/employee/service/customer/${encodeURIComponent(id)}`);
-    renderTable('serviceResults', data.service_orders || data, ['ID','Date_From','Date_To','ServiceStatus','Price','assigned_employee','service_type','labor_hours','labor_rate','part_name','part_price']);
+    renderTable('serviceResults', flattenServiceOrders(data.service_orders), ['ID','Date_From','Date_To','ServiceStatus','Price','assigned_employee','service_type','labor_hours','labor_rate','part_name','part_price']);
   }catch(e){console.error(e); alert('Error fetching service by customer')}
 });
 